@@ -0,0 +1,55 @@
+# 새 파이썬 프로세스에서 스크립트(app.py 또는 페이지) 하나를 처음 실행하는 시간 (콜드 스타트).
+#
+#   python -m benchmarks.cold_start app.py
+#   python -m benchmarks.cold_start "pages/1_📊_대시보드.py"
+#
+# 컨테이너를 다시 띄운 직후 첫 화면과 같은 상황: import도, st.cache_* 도 아무것도 없는 상태.
+# benchmarks/run.py 가 스크립트마다 따로 프로세스를 띄워 부르고, 결과는 stdout에 JSON 한 줄.
+#   streamlit  streamlit + AppTest import 시간 (초)
+#   first_run  스크립트 첫 실행 시간: 모듈 import + 가짜 시트 로드 + 화면 구성 (초)
+#   loaded     실행 뒤 올라와 있는 무거운 모듈 (HEAVY_MODULES 중)
+import time
+
+_START = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+# 처음 쓸 때까지 미뤄 두는 모듈 (페이지가 쓰지 않으면 올라오지 않아야 한다)
+HEAVY_MODULES = ['plotly.express', 'googleapiclient.discovery']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='스크립트 하나의 콜드 스타트 시간')
+    parser.add_argument('script', help='저장소 기준 경로 (app.py, pages/...)')
+    parser.add_argument('--rows', type=int, default=1000, help='가짜 시트에 채워 둘 예약 수')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args(argv)
+
+    os.environ['PENSION_CACHE_DIR'] = tempfile.mkdtemp(prefix='pension-cold-')
+    os.environ['FAKE_GOOGLE'] = f'seed_rows={args.rows}'
+
+    from streamlit.logger import set_log_level
+    from streamlit.testing.v1 import AppTest
+    set_log_level('error')
+    imported = time.perf_counter()
+
+    at = AppTest.from_file(str(ROOT / args.script), default_timeout=args.timeout)
+    at.run()
+    done = time.perf_counter()
+
+    print(json.dumps({
+        'streamlit': imported - _START,
+        'first_run': done - imported,
+        'loaded': [m for m in HEAVY_MODULES if m in sys.modules],
+        'errors': [str(e.value) for e in at.exception],
+    }, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
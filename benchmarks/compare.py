@@ -0,0 +1,76 @@
+# 벤치마크 결과 JSON 두 개 비교.
+#
+#   python -m benchmarks.compare benchmarks/results/이전.json benchmarks/results/새.json
+#   python -m benchmarks.compare 이전.json 새.json --threshold 0.1
+#
+# 같은 행 수 · 같은 단계끼리 (콜드 스타트는 가짜 시트 행 수가 같을 때 스크립트끼리) 중앙값을 비교해서 threshold(기본 20%)보다, 그리고 min-ms(기본 5ms)보다
+# 더 느려진 항목에 표시하고 (아주 짧은 단계의 흔들림은 무시),
+# 그런 항목이 하나라도 있으면 종료 코드 1로 끝난다.
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _timings(entry):
+    """{단계 이름: 초} (단계는 중앙값, 페이지는 처음/재실행)"""
+    out = {name: t['median'] for name, t in entry.get('stages', {}).items()}
+    for page, r in entry.get('render', {}).items():
+        out[f'render.{page}.cold'] = r['cold']
+        out[f'render.{page}.warm'] = r['warm']
+    return out
+
+
+def _cold_timings(report):
+    """{cold_start.스크립트: 첫 실행 초}"""
+    scripts = report.get('cold_start', {}).get('scripts', {})
+    return {f'cold_start.{script}': r['first_run'] for script, r in scripts.items()}
+
+
+def compare(old, new, threshold, min_seconds=0.0):
+    """[(구분, 단계, 이전, 새, 비율, 느려짐 여부)] 와 느려진 항목 수. 구분은 행 수 또는 '콜드'"""
+    groups = [(f'{int(size):,}', _timings(old['results'][size]), _timings(entry))
+              for size, entry in new['results'].items() if size in old['results']]
+    old_cold, new_cold = old.get('cold_start'), new.get('cold_start')
+    if old_cold and new_cold and old_cold['rows'] == new_cold['rows']:
+        groups.insert(0, ('콜드', _cold_timings(old), _cold_timings(new)))
+
+    rows = []
+    regressions = 0
+    for label, before, after in groups:
+        for name in after:
+            if name not in before:
+                continue
+            ratio = after[name] / before[name] if before[name] else float('inf')
+            slower = ratio > 1 + threshold and after[name] - before[name] > min_seconds
+            rows.append((label, name, before[name], after[name], ratio, slower))
+            regressions += slower
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='벤치마크 결과 비교')
+    parser.add_argument('old', type=Path)
+    parser.add_argument('new', type=Path)
+    parser.add_argument('--threshold', type=float, default=0.2, help='이 비율 이상 느려지면 회귀로 표시')
+    parser.add_argument('--min-ms', type=float, default=5.0, help='이보다 적게 늘어난 것은 무시 (밀리초)')
+    args = parser.parse_args(argv)
+
+    old = json.loads(args.old.read_text(encoding='utf-8'))
+    new = json.loads(args.new.read_text(encoding='utf-8'))
+    rows, regressions = compare(old, new, args.threshold, args.min_ms / 1000)
+    if not rows:
+        print("비교할 수 있는 항목이 없습니다 (행 수가 겹치지 않음).")
+        return 0
+
+    print(f"이전 {old['environment'].get('commit') or '?'} ({old['created']})"
+          f"  →  새 {new['environment'].get('commit') or '?'} ({new['created']})")
+    for label, name, before, after, ratio, slower in rows:
+        mark = '  ▲ 느려짐' if slower else ('  ▼' if ratio < 1 - args.threshold else '')
+        print(f"{label:>9}  {name:<36} {before * 1000:10.1f} → {after * 1000:10.1f} ms  ×{ratio:5.2f}{mark}")
+    print(f"\n느려진 항목 {regressions}개 (기준 +{args.threshold:.0%}, {args.min_ms:g}ms 이상)")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+# 예약 데이터가 쌓일수록 어느 단계가 느려지는지 재는 벤치마크.
+#
+#   python -m benchmarks.run                                   # 1천 ~ 1백만 행
+#   python -m benchmarks.run --sizes 1000,10000 --repeat 5
+#   python -m benchmarks.compare 이전.json 새.json              # 두 실행 결과 비교
+#
+# 행 수마다 합성 시트(benchmarks/synthetic.py)를 만들어
+#   load.clean → filter.* → aggregate.* → chart.data → chart.figures(캐시 없이 그래프 8개 생성) 단계를 각각 repeat번 재고 (최소/중앙값, 초),
+#   render-max 이하 크기에서는 세 페이지를 Streamlit AppTest로 실제 실행한다.
+# 페이지 실행 때 시트는 utils/fake_google.py 의 가짜 서버를 쓰므로 구글 API는 호출하지 않으며,
+# 가짜 서버가 받은 호출 수도 결과에 남긴다.
+# 콜드 스타트: app.py와 각 페이지를 새 프로세스에서 처음 실행하는 시간(benchmarks/cold_start.py)을
+#   cold-start번 재서 중앙값이 COLD_START_TARGET 안에 드는지 본다.
+# 결과는 benchmarks/results/<시각>.json. 로컬 캐시는 임시 폴더를 쓰므로 실제 .cache는 건드리지 않는다.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+PAGES = sorted(p.name for p in (ROOT / 'pages').glob('*.py'))
+COLD_START_SCRIPTS = ['app.py'] + [f'pages/{page}' for page in PAGES]
+# 컨테이너 재시작 직후 첫 화면 목표: 스크립트 첫 실행(모듈 import + 가짜 시트 1천 행 로드 + 화면 구성), 초.
+# streamlit 자체 import는 서버가 뜰 때 한 번이라 빼고 따로 기록한다
+COLD_START_TARGET = 1.5
+
+# utils를 import하기 전에: 가짜 구글 서버 + 임시 캐시 폴더
+_CACHE_DIR = tempfile.mkdtemp(prefix='pension-bench-')
+os.environ['PENSION_CACHE_DIR'] = _CACHE_DIR
+os.environ.setdefault('FAKE_GOOGLE', 'seed_rows=0')
+
+import pandas as pd  # noqa: E402
+import streamlit as st  # noqa: E402
+from streamlit.logger import set_log_level  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from benchmarks.synthetic import synthetic_sheet  # noqa: E402
+from utils import charts, dates, sheets  # noqa: E402
+from utils.analytics import (  # noqa: E402
+    build_month_cube, build_month_cube_sql, lead_time_days, lead_time_summary, lead_time_by_month,
+    cube_year_months, cube_years, cube_year,
+)
+from utils.local_db import LocalStore  # noqa: E402
+from utils.search import build_search_index, filter_positions, search_positions  # noqa: E402
+from utils.sync import invalidate_snapshot  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# AppTest 밖에서 캐시 함수를 부를 때 나오는 'No runtime found' 경고 끄기
+set_log_level('error')
+
+
+def _timed(fn, repeat, setup=None):
+    """fn을 repeat번 실행한 시간 {'min', 'median', 'runs'}과 마지막 결과.
+    setup이 있으면 매번 그 반환값을 fn에 넘긴다 (setup 시간은 빼고 잰다)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'runs': repeat}, result
+
+
+def _fresh_raw(raw):
+    """매번 처음 여는 것처럼: 원본 복사 + 날짜 파싱 메모 비우기"""
+    dates._MEMO.clear()
+    return raw.copy()
+
+
+# ── 단계별 ───────────────────────────────────────────────────
+def bench_stages(raw, repeat, workdir):
+    stages = {}
+
+    stages['load.clean'], df = _timed(sheets._clean, repeat, setup=lambda: _fresh_raw(raw))
+    year = int(df['연도'].max())
+    month = int(df.loc[df['연도'] == year, '숙박 월'].mode().iloc[0])
+
+    stages['filter.index'], index = _timed(lambda: build_search_index(df), repeat)
+    stages['filter.year_month'], _ = _timed(lambda: filter_positions(index, year, month), repeat)
+    stages['filter.name'], _ = _timed(lambda: search_positions(index, '김', filter_positions(index, year)), repeat)
+    stages['filter.choseong'], _ = _timed(lambda: search_positions(index, 'ㄱㅁ', filter_positions(index)), repeat)
+    stages['filter.phone'], _ = _timed(lambda: search_positions(index, '1234', filter_positions(index)), repeat)
+
+    stages['aggregate.month_cube'], cube = _timed(lambda: build_month_cube(df), repeat)
+    store = LocalStore(Path(workdir) / f'bench-{len(raw)}.db', ['No'] + sheets.COLUMNS)
+    stages['store.replace_all'], _ = _timed(lambda _: store.replace_all(raw), repeat, setup=store.mark_stale)
+    stages['aggregate.month_cube_sql'], _ = _timed(lambda: build_month_cube_sql(store), repeat)
+    store.conn.close()
+
+    df_year = df[df['연도'] == year]
+
+    def lead_time():
+        lead = lead_time_days(df_year)
+        return lead_time_summary(lead), lead_time_by_month(lead, df_year['숙박 월'])
+
+    def services():
+        return (sheets.service_usage(df_year), sheets.service_usage(df_year, by='숙박 월'),
+                sheets.service_combinations(df_year))
+
+    def chart_data():
+        return (cube_year(cube, year), cube_year_months(cube, year), cube_years(cube),
+                df[df['연도'] == year])
+
+    stages['aggregate.lead_time'], _ = _timed(lead_time, repeat)
+    stages['aggregate.services'], _ = _timed(services, repeat)
+    stages['chart.data'], _ = _timed(chart_data, repeat)
+
+    monthly = cube_year_months(cube, year)
+    yearly = cube_years(cube)['매출'].reset_index()
+    yearly['연도'] = yearly['연도'].astype(str)
+    service_df = sheets.service_usage(df_year)
+
+    def figures():
+        return (charts.monthly_revenue_bar(monthly), charts.service_pie(service_df),
+                charts.guest_line(monthly), charts.guest_mix_bar(monthly),
+                charts.monthly_trend(monthly), charts.yearly_revenue_bar(yearly),
+                charts.service_rate_bar(service_df), charts.guest_histogram(df_year))
+
+    stages['chart.figures'], _ = _timed(figures, repeat)
+    return stages, len(df)
+
+
+# ── 페이지 실행 (AppTest) ────────────────────────────────────
+def _reset_app_state():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    invalidate_snapshot()
+    dates._MEMO.clear()
+
+
+def bench_pages(raw, timeout):
+    """페이지마다 처음 실행(캐시 없음, 가짜 시트에서 전체 다운로드)과 바로 다음 재실행 시간"""
+    _reset_app_state()
+    fake = sheets.get_fake_google()
+    fake.worksheet.load_records(raw.to_dict('records'))
+
+    results = {}
+    for page in PAGES:
+        st.cache_data.clear()
+        invalidate_snapshot()
+        dates._MEMO.clear()
+        fake.reset_counters()
+
+        at = AppTest.from_file(str(ROOT / 'pages' / page), default_timeout=timeout)
+        start = time.perf_counter()
+        at.run()
+        cold = time.perf_counter() - start
+        calls = dict(fake.calls)
+        start = time.perf_counter()
+        at.run()
+        warm = time.perf_counter() - start
+
+        results[Path(page).stem] = {
+            'cold': cold,
+            'warm': warm,
+            'api_calls': calls,
+            'errors': [str(e.value) for e in at.exception],
+        }
+    return results
+
+
+# ── 콜드 스타트 (새 프로세스) ────────────────────────────────
+def bench_cold_start(repeat, rows, timeout):
+    """스크립트마다 새 프로세스를 repeat번 띄워 잰 첫 실행 시간 (중앙값)과 목표 통과 여부"""
+    results = {}
+    for script in COLD_START_SCRIPTS:
+        runs = []
+        for _ in range(repeat):
+            proc = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.cold_start', script,
+                 '--rows', str(rows), '--timeout', str(timeout)],
+                cwd=ROOT, capture_output=True, text=True, timeout=timeout + 60,
+            )
+            if proc.returncode != 0 or not proc.stdout.strip():
+                raise RuntimeError(f"{script} 콜드 스타트 측정 실패:\n{proc.stderr[-2000:]}")
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        first_run = statistics.median(r['first_run'] for r in runs)
+        results[Path(script).stem] = {
+            'streamlit': statistics.median(r['streamlit'] for r in runs),
+            'first_run': first_run,
+            'ok': first_run <= COLD_START_TARGET,
+            'loaded': runs[-1]['loaded'],
+            'errors': runs[-1]['errors'],
+        }
+    return results
+
+
+# ── 실행 ─────────────────────────────────────────────────────
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'streamlit': st.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def _print_size(n, entry):
+    print(f"\n── {n:,}행 (정리 후 {entry['clean_rows']:,}행, 생성 {entry['generate']:.2f}초)")
+    for name, t in entry['stages'].items():
+        print(f"  {name:<32} {t['median'] * 1000:10.1f} ms  (최소 {t['min'] * 1000:.1f})")
+    for page, r in entry.get('render', {}).items():
+        errors = f"  오류 {len(r['errors'])}건" if r['errors'] else ''
+        print(f"  render.{page:<25} 처음 {r['cold']:7.2f} s  재실행 {r['warm']:6.2f} s"
+              f"  API {sum(r['api_calls'].values())}회{errors}")
+
+
+def _print_cold_start(cold):
+    print(f"\n── 콜드 스타트 (새 프로세스, 가짜 시트 {cold['rows']:,}행, 목표 {cold['target']:g}초)")
+    for script, r in cold['scripts'].items():
+        mark = '' if r['ok'] else '  ▲ 목표 초과'
+        errors = f"  오류 {len(r['errors'])}건" if r['errors'] else ''
+        loaded = f"  [{', '.join(r['loaded'])}]" if r['loaded'] else ''
+        print(f"  {script:<32} 첫 실행 {r['first_run']:6.2f} s  (streamlit import {r['streamlit']:.2f} s)"
+              f"{loaded}{errors}{mark}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='예약 데이터 규모별 벤치마크')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='쉼표로 구분한 행 수 (기본: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='단계별 반복 횟수')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--render-max', type=int, default=100_000,
+                        help='이 행 수 이하에서만 페이지를 AppTest로 실행 (0이면 생략)')
+    parser.add_argument('--timeout', type=float, default=600, help='페이지 한 번 실행 제한 시간(초)')
+    parser.add_argument('--cold-start', type=int, default=3,
+                        help='스크립트마다 콜드 스타트를 잴 횟수 (0이면 생략)')
+    parser.add_argument('--cold-rows', type=int, default=1000, help='콜드 스타트 때 가짜 시트의 예약 수')
+    parser.add_argument('--out', help='결과 JSON 경로 (기본: benchmarks/results/<시각>.json)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(s.replace('_', '')) for s in args.sizes.split(',') if s.strip()]
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': _environment(),
+        'params': {'sizes': sizes, 'repeat': args.repeat, 'seed': args.seed,
+                   'render_max': args.render_max, 'fake_google': os.environ['FAKE_GOOGLE']},
+        'results': {},
+    }
+
+    if args.cold_start > 0:
+        report['cold_start'] = {
+            'target': COLD_START_TARGET, 'rows': args.cold_rows, 'repeat': args.cold_start,
+            'scripts': bench_cold_start(args.cold_start, args.cold_rows, args.timeout),
+        }
+        _print_cold_start(report['cold_start'])
+
+    for n in sizes:
+        start = time.perf_counter()
+        raw = synthetic_sheet(n, seed=args.seed)
+        entry = {'rows': n, 'generate': time.perf_counter() - start}
+        entry['stages'], entry['clean_rows'] = bench_stages(raw, args.repeat, _CACHE_DIR)
+        if n <= args.render_max:
+            entry['render'] = bench_pages(raw, args.timeout)
+        report['results'][str(n)] = entry
+        _print_size(n, entry)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\n결과 저장: {out}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# 벤치마크용 합성 예약 시트.
+# 실제 시트처럼 날짜 표기가 섞여 있고('2025-03-01', '2025/03/01', '25-03-01', '2025. 3. 1', 시각 포함),
+# 서비스 칸은 'O' / 'X' / '✓' / 빈칸, 금액은 '150,000' / '₩150,000', 중간중간 빈 행이 있다.
+# 행 수가 많아도 금방 만들 수 있게 열 단위(numpy)로 생성한다.
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.sheets import COLUMNS, SERVICE_COLS
+
+HEADER = ['No'] + COLUMNS
+
+_SURNAMES = '김이박최정강조윤장임한오서신권황안송류홍'
+_GIVEN = ['민준', '서연', '도윤', '하은', '지호', '수아', '예준', '지우', '길동', '영희',
+          '시우', '하린', '주원', '지아', '건우', '서윤', '현우', '채원', '우진', '다은']
+_NAMES = np.array([s + g for s in _SURNAMES for g in _GIVEN], dtype=object)
+_FLAGS = np.array(['O', 'X', 'X', 'X', '✓', ''], dtype=object)
+_LEADS = np.array([0, 1, 3, 7, 14, 30, 60, 90])
+_NOTES = np.array([''] * 17 + ['입금 확인', '늦은 체크인', '반려견 동반'], dtype=object)
+
+# 날짜 표기와 비율: ISO / 슬래시 / 두 자리 연도 / 표시 형식 / 시각 포함
+_DATE_FORMATS = [
+    lambda d: f'{d.year}-{d.month:02}-{d.day:02}',
+    lambda d: f'{d.year}/{d.month:02}/{d.day:02}',
+    lambda d: f'{d.year % 100:02}-{d.month:02}-{d.day:02}',
+    lambda d: f'{d.year}. {d.month}. {d.day}',
+    lambda d: f'{d.year}-{d.month:02}-{d.day:02} 15:00:00',
+]
+_DATE_WEIGHTS = [0.7, 0.1, 0.1, 0.05, 0.05]
+
+
+def _str(values):
+    """정수 배열 → 문자열 배열 (고유값만 변환해서 펼침)"""
+    uniques, codes = np.unique(values, return_inverse=True)
+    return np.array([str(v) for v in uniques.tolist()], dtype=object)[codes]
+
+
+def _format_dates(days, kinds):
+    """datetime64[D] 배열 → 행마다 kinds(_DATE_FORMATS 번호)에 따른 표기"""
+    uniques, codes = np.unique(days, return_inverse=True)
+    table = np.array([[fmt(d) for fmt in _DATE_FORMATS] for d in uniques.tolist()], dtype=object)
+    return table[codes, kinds]
+
+
+def synthetic_sheet(n, seed=0, years=10, blank_ratio=0.02):
+    """load_raw_frame 결과와 같은 모양(헤더 = No + COLUMNS, 값은 모두 문자열)의 예약 n행.
+    최근 years년에 고르게 퍼뜨리고, 약 blank_ratio 비율은 통째로 빈 행"""
+    rng = np.random.default_rng(seed)
+    this_year = date.today().year
+
+    stay_year = rng.integers(this_year - years + 1, this_year + 1, n)
+    stay = (stay_year - 1970).astype('datetime64[Y]').astype('datetime64[D]') + rng.integers(0, 365, n)
+    reserved = stay - rng.choice(_LEADS, n)
+    nights = rng.choice([1, 1, 1, 2, 2, 3], n)
+    adults = rng.integers(1, 7, n)
+    children = rng.integers(0, 4, n)
+    total = adults + children
+    amount = rng.integers(10, 61, n) * 10000
+
+    def dates(values):
+        return _format_dates(values, rng.choice(len(_DATE_FORMATS), n, p=_DATE_WEIGHTS))
+
+    reserved_index = pd.DatetimeIndex(reserved)
+    amount_text = np.array([f'{v:,}' for v in range(0, 610001, 10000)], dtype=object)[amount // 10000]
+    ids = rng.bytes(6 * n).hex()
+    data = {
+        'No': _str(np.arange(1, n + 1)),
+        '연도': _str(reserved_index.year),
+        '성함': rng.choice(_NAMES, n),
+        '전화번호': '010-' + _str(rng.integers(1000, 10000, n)) + '-' + _str(rng.integers(1000, 10000, n)),
+        '예약 월': _str(reserved_index.month),
+        '예약 일자': dates(reserved),
+        '숙박 월': _str(pd.DatetimeIndex(stay).month),
+        '숙박 일자': dates(stay),
+        '숙박 일수': _str(nights),
+        '퇴실 일자': dates(stay + nights.astype('timedelta64[D]')),
+        '인원수': _str(total),
+        '어른 인원수': _str(adults),
+        '아이 인원수': _str(children),
+        '추가 인원수': _str(np.maximum(total - 2, 0)),
+        '금액': np.where(rng.random(n) < 0.2, '₩' + amount_text, amount_text),
+        '비고': rng.choice(_NOTES, n),
+        '캘린더ID': np.full(n, '', dtype=object),
+        '예약ID': np.array([ids[i:i + 12] for i in range(0, 12 * n, 12)], dtype=object),
+    }
+    for col in SERVICE_COLS:
+        data[col] = rng.choice(_FLAGS, n)
+
+    frame = pd.DataFrame({col: data[col] for col in HEADER})
+    blank = rng.random(n) < blank_ratio
+    frame.loc[blank, :] = ''
+    return frame
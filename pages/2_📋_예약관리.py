@@ -1,14 +1,25 @@
 import streamlit as st
 import pandas as pd
+import math
 from datetime import datetime
-import sys
-import os
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.sheets import load_data, add_row, update_row, delete_row, COLUMNS, is_checked
-from utils.calendar_utils import add_calendar_event, delete_calendar_event
+from utils.sheets import (
+    load_data, refresh_data, get_data_version, add_row, add_rows, set_calendar_ids, COLUMNS,
+    update_reservation, delete_reservation, assign_missing_ids, RowChangedError,
+)
+from utils.dates import format_date, parse_date
+from utils.search import PAGE_SIZE, get_search_index, filter_positions, search_positions, page_slice
+from utils.occupancy import get_occupancy_index, booking_key
+from utils.transfer import read_upload, prepare_import, import_rows, export_csv, export_xlsx, xlsx_available
+from utils.calendar_utils import (
+    update_calendar_event, build_event_from_row,
+    missing_calendar_rows, backfill_calendar_events, reconcile_calendar,
+)
+from utils.calendar_worker import get_calendar_worker, enqueue_calendar_insert, enqueue_calendar_delete
+from utils.perf import begin_run, end_run, span
 
 st.set_page_config(page_title="예약 관리", page_icon="📋", layout="wide")
+begin_run("예약관리")
 
 col_title, col_btn = st.columns([5, 1])
 with col_title:
@@ -16,16 +27,30 @@ with col_title:
 with col_btn:
     st.markdown("<br>", unsafe_allow_html=True)
     if st.button("🔄 새로고침", use_container_width=True):
+        refresh_data()
         st.rerun()
 
-tab1, tab2 = st.tabs(["📋 예약 목록 / 수정 / 삭제", "➕ 새 예약 추가"])
+
+def show_overlaps(conflicts):
+    """겹치는 예약이 있으면 저장 전에 경고"""
+    if conflicts:
+        lines = '\n'.join(f"- {c['성함']}: {c['체크인']:%Y-%m-%d} ~ {c['체크아웃']:%Y-%m-%d}" for c in conflicts)
+        st.warning(f"⚠️ 이미 예약된 날짜와 겹칩니다 ({len(conflicts)}건)\n{lines}")
+
+
+tab1, tab2, tab3 = st.tabs(["📋 예약 목록 / 수정 / 삭제", "➕ 새 예약 추가", "📥 일괄 가져오기"])
 
 # ═══════════════════════════════════════════════════════════
 # TAB 1: 예약 목록
 # ═══════════════════════════════════════════════════════════
 with tab1:
-    with st.spinner("데이터 불러오는 중..."):
+    with st.spinner("데이터 불러오는 중..."), span('page.load_data'):
         df = load_data()
+        # 예약ID가 없는 옛 행은 처음 한 번 ID를 채운다
+        if not df.empty and (df['예약ID'] == '').any():
+            if not assign_missing_ids():
+                refresh_data()
+            df = load_data()
 
     if df.empty:
         st.warning("등록된 예약이 없습니다. '새 예약 추가' 탭에서 추가해주세요.")
@@ -33,34 +58,95 @@ with tab1:
         # ── 필터 ──
         col1, col2, col3 = st.columns(3)
         with col1:
-            years = ["전체"] + sorted(df['연도'].astype(str).unique().tolist(), reverse=True)
+            years = ["전체"] + sorted(df['연도'].unique().tolist(), reverse=True)
             year_filter = st.selectbox("연도", years)
         with col2:
-            months = ["전체"] + [str(m) for m in range(1, 13)]
+            months = ["전체"] + list(range(1, 13))
             month_filter = st.selectbox("숙박 월", months)
         with col3:
-            search_name = st.text_input("성함 검색", placeholder="이름 입력...")
-
-        filtered = df.copy()
-        if year_filter != "전체":
-            filtered = filtered[filtered['연도'].astype(str) == year_filter]
-        if month_filter != "전체":
-            filtered = filtered[filtered['숙박 월'].astype(str) == month_filter]
-        if search_name:
-            filtered = filtered[filtered['성함'].astype(str).str.contains(search_name, na=False)]
+            search_name = st.text_input("성함 / 전화번호 검색", placeholder="이름, 초성(ㅎㄱㄷ), 전화번호...")
+
+        # 연도·월 인덱스로 후보 행을 바로 찾고, 검색은 그 안에서만
+        with span('page.filter'):
+            search_index = get_search_index(df)
+            positions = filter_positions(
+                search_index,
+                year=None if year_filter == "전체" else year_filter,
+                month=None if month_filter == "전체" else month_filter,
+            )
+            positions = search_positions(search_index, search_name, positions)
+            filtered = df.iloc[positions]
 
-        st.markdown(f"**총 {len(filtered)}건**")
+        page_count = max(1, math.ceil(len(positions) / PAGE_SIZE))
+        col_count, col_page = st.columns([4, 1])
+        with col_count:
+            st.markdown(f"**총 {len(filtered)}건**")
+        with col_page:
+            page = st.number_input(f"페이지 (총 {page_count})", 1, page_count, 1) if page_count > 1 else 1
 
         display_cols = ['연도', '예약 월', '예약 일자', '숙박 월', '숙박 일자', '퇴실 일자', '성함', '전화번호',
                         '인원수', '숙박 일수', '바비큐 1', '불멍', '바비큐+불멍',
                         '수영장 사용', '리뷰이벤트', '금액', '비고']
         display_cols = [c for c in display_cols if c in filtered.columns]
 
-        st.dataframe(
-            filtered[display_cols].style.format({'금액': '₩{:,.0f}'}),
-            use_container_width=True,
-            height=300
-        )
+        # 현재 페이지 행만 브라우저로 전송
+        with span('page.table'):
+            page_df = df.iloc[page_slice(positions, page)]
+            st.dataframe(
+                page_df[display_cols].style.format(
+                    {'금액': '₩{:,.0f}', '예약 일자': '{:%Y-%m-%d}', '숙박 일자': '{:%Y-%m-%d}', '퇴실 일자': '{:%Y-%m-%d}'},
+                    na_rep=''
+                ),
+                use_container_width=True,
+                height=300
+            )
+
+        # ── 내보내기 (필터 결과 전체, 버튼을 누를 때 생성) ──
+        stamp = datetime.now().strftime('%Y%m%d')
+        col_csv, col_xlsx, _ = st.columns([1, 1, 3])
+        with col_csv:
+            st.download_button("⬇️ CSV", data=lambda: export_csv(filtered), file_name=f"예약_{stamp}.csv",
+                               mime="text/csv", use_container_width=True)
+        with col_xlsx:
+            if xlsx_available():
+                st.download_button("⬇️ 엑셀", data=lambda: export_xlsx(filtered), file_name=f"예약_{stamp}.xlsx",
+                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                   use_container_width=True)
+
+        # ── 캘린더 백그라운드 작업 상태 ──
+        cal_worker = get_calendar_worker()
+        if cal_worker.pending():
+            st.caption(f"📅 캘린더 반영 대기 중: {cal_worker.pending()}건")
+        if cal_worker.failures:
+            with st.expander(f"⚠️ 캘린더 반영 실패 {len(cal_worker.failures)}건"):
+                st.dataframe(pd.DataFrame(list(cal_worker.failures)), use_container_width=True, hide_index=True)
+
+        # ── 캘린더 일괄 등록 (캘린더ID가 빈 예약) ──
+        missing_cal = missing_calendar_rows(df)
+        if not missing_cal.empty:
+            with st.expander(f"📅 캘린더 미등록 예약 {len(missing_cal)}건"):
+                st.caption("캘린더ID가 비어 있는 예약의 이벤트를 한 번에 만들고 캘린더ID를 채웁니다.")
+                if st.button("📅 캘린더 일괄 등록", key="cal_backfill"):
+                    with st.spinner("캘린더 등록 중..."), span('calendar.backfill'):
+                        created, cal_errors = backfill_calendar_events(missing_cal)
+                        if created:
+                            set_calendar_ids(created)
+                    if created:
+                        st.success(f"✅ {len(created)}건을 캘린더에 등록했습니다.")
+                    for name, msg in cal_errors:
+                        st.warning(f"{name}: {msg}")
+
+        with st.expander("🔄 캘린더 동기화"):
+            st.caption("캘린더에서 바뀌거나 지워진 이벤트, 시트에서 수정·삭제된 예약을 찾아 캘린더를 시트 내용에 맞춥니다. "
+                       "지난 동기화 이후 바뀐 이벤트만 조회합니다.")
+            if st.button("🔄 캘린더 동기화 실행", key="cal_reconcile"):
+                with st.spinner("캘린더 동기화 중..."), span('calendar.reconcile'):
+                    result = reconcile_calendar(df)
+                    if result['created']:
+                        set_calendar_ids(result['created'])
+                st.success(f"수정 {result['patched']}건 / 재생성 {len(result['created'])}건 / 삭제 {result['deleted']}건")
+                for msg in result['errors']:
+                    st.warning(msg)
 
         # ── 수정 / 삭제 ──
         st.divider()
@@ -70,26 +156,21 @@ with tab1:
             st.info("필터 조건에 해당하는 예약이 없습니다.")
         else:
             # 이름 검색으로 빠르게 좁히기
-            edit_search = st.text_input("🔍 이름으로 검색", placeholder="성함 입력...", key="edit_search")
-            edit_df = filtered[filtered['성함'].astype(str).str.contains(edit_search, na=False)] if edit_search else filtered
+            edit_search = st.text_input("🔍 이름으로 검색", placeholder="성함, 초성, 전화번호...", key="edit_search")
+            edit_df = df.iloc[search_positions(search_index, edit_search, positions)]
 
             if edit_df.empty:
                 st.warning("검색 결과가 없습니다.")
                 st.stop()
 
-            options = []
-            for df_idx, row in edit_df.iterrows():
-                label = (f"{row.get('연도', '')}년 "
-                         f"{row.get('숙박 월', '')}월 "
-                         f"{row.get('숙박 일자', '')} - "
-                         f"{row.get('성함', '')} "
-                         f"({int(row.get('금액', 0)):,}원)")
-                options.append((label, df_idx))
-
-            selected_label = st.selectbox(f"예약 선택 ({len(options)}건)", [o[0] for o in options])
-            selected_df_idx = next(o[1] for o in options if o[0] == selected_label)
-            selected_row = df.loc[selected_df_idx]
-            sheet_row = int(selected_row['_sheet_row'])
+            # 옵션은 예약ID, 라벨·행 위치는 인덱스에서 바로 조회 (같은 라벨이어도 서로 다른 예약으로 구분)
+            options = edit_df['예약ID'].tolist()
+            selected_key = st.selectbox(f"예약 선택 ({len(options)}건)", options,
+                                        format_func=search_index['label_by_key'].__getitem__)
+            selected_row = df.iloc[search_index['position_by_key'][selected_key]]
+            with span('page.occupancy'):
+                occupancy = get_occupancy_index(df)
+            occupancy_key = booking_key(selected_row['예약ID'], selected_row['_sheet_row'])
 
             action = st.radio("작업 선택", ["수정", "삭제"], horizontal=True)
 
@@ -97,17 +178,8 @@ with tab1:
                 from datetime import timedelta
 
                 def parse_to_date(val):
-                    try:
-                        s = str(val).strip()
-                        if not s or s in ['0', 'nan', '']:
-                            return datetime.now().date()
-                        parts = s.replace('/', '-').split('-')
-                        if len(parts) == 3 and len(parts[0]) == 2:
-                            s = '20' + s
-                        result = pd.to_datetime(s, errors='coerce')
-                        return result.date() if not pd.isna(result) else datetime.now().date()
-                    except:
-                        return datetime.now().date()
+                    result = parse_date(val)
+                    return result.date() if result is not None else datetime.now().date()
 
                 st.markdown("**예약 정보 수정**")
                 col1, col2 = st.columns(2)
@@ -120,6 +192,8 @@ with tab1:
                     e_nights = st.number_input("숙박 일수", 1, 30, int(selected_row.get('숙박 일수', 1)), key="e_nights")
                     e_checkout = e_stay_date + timedelta(days=int(e_nights))
                     st.success(f"퇴실 일자: **{e_checkout.strftime('%Y-%m-%d')}** (자동계산)")
+                # 자기 자신은 빼고 겹치는 예약 확인
+                show_overlaps(occupancy.overlaps(e_stay_date, e_nights, exclude=occupancy_key))
 
                 col3, col4 = st.columns(2)
                 with col3:
@@ -129,11 +203,11 @@ with tab1:
                     e_extra = max(0, e_total - 2)
                     st.info(f"추가 인원수: **{e_extra}명** (자동계산: 총 인원 - 2)")
                 with col4:
-                    e_bbq = st.checkbox("바비큐 1", value=is_checked(selected_row.get('바비큐 1', '')), key="e_bbq")
-                    e_bonfire = st.checkbox("불멍", value=is_checked(selected_row.get('불멍', '')), key="e_bonfire")
-                    e_bbq_bonfire = st.checkbox("바비큐+불멍", value=is_checked(selected_row.get('바비큐+불멍', '')), key="e_bbq_bonfire")
-                    e_pool = st.checkbox("수영장 사용", value=is_checked(selected_row.get('수영장 사용', '')), key="e_pool")
-                    e_review = st.checkbox("리뷰이벤트", value=is_checked(selected_row.get('리뷰이벤트', '')), key="e_review")
+                    e_bbq = st.checkbox("바비큐 1", value=bool(selected_row.get('바비큐 1', False)), key="e_bbq")
+                    e_bonfire = st.checkbox("불멍", value=bool(selected_row.get('불멍', False)), key="e_bonfire")
+                    e_bbq_bonfire = st.checkbox("바비큐+불멍", value=bool(selected_row.get('바비큐+불멍', False)), key="e_bbq_bonfire")
+                    e_pool = st.checkbox("수영장 사용", value=bool(selected_row.get('수영장 사용', False)), key="e_pool")
+                    e_review = st.checkbox("리뷰이벤트", value=bool(selected_row.get('리뷰이벤트', False)), key="e_review")
 
                 e_amount = st.number_input("금액(원)", 0, 99999999, int(selected_row.get('금액', 0)), step=10000, key="e_amount")
                 e_notes = st.text_area("비고", value=str(selected_row.get('비고', '')), key="e_notes")
@@ -152,24 +226,43 @@ with tab1:
                         'O' if e_review else 'X',
                         e_amount, e_notes
                     ]
-                    update_row(sheet_row, row_data)
-                    st.success(f"✅ {e_name} 님 예약이 수정되었습니다!")
-                    st.rerun()
+                    try:
+                        # 이 예약 행만 다시 읽어 불러온 뒤 바뀌지 않았는지 확인하고 저장
+                        update_reservation(selected_row, row_data)
+                    except RowChangedError as e:
+                        refresh_data()
+                        st.error(f"⚠️ {e} 최신 내용을 불러왔으니 확인 후 다시 저장해주세요.")
+                    else:
+                        occupancy.add(occupancy_key, e_stay_date, e_nights, label=e_name)
+                        occupancy.advance(get_data_version())
+                        # 캘린더 이벤트도 같은 내용으로 수정
+                        cal_event_id = selected_row.get('캘린더ID', '')
+                        if str(cal_event_id).strip() not in ['', 'nan']:
+                            update_calendar_event(cal_event_id, build_event_from_row(dict(zip(COLUMNS, row_data))))
+                        st.success(f"✅ {e_name} 님 예약이 수정되었습니다!")
+                        st.rerun()
 
             else:  # 삭제
-                st.warning(f"**{selected_row.get('성함', '')}** 님 ({selected_row.get('숙박 월', '')}월 {selected_row.get('숙박 일자', '')}일) 예약을 삭제하시겠습니까?")
+                st.warning(f"**{selected_row.get('성함', '')}** 님 ({format_date(selected_row.get('숙박 일자'))}) 예약을 삭제하시겠습니까?")
                 col_yes, col_no, _ = st.columns([1, 1, 3])
                 with col_yes:
                     if st.button("🗑️ 삭제 확인", type="primary"):
-                        # 캘린더 이벤트 먼저 삭제
-                        cal_event_id = selected_row.get('캘린더ID', '')
-                        cal_ok, cal_msg = delete_calendar_event(cal_event_id)
-                        delete_row(sheet_row)
-                        if cal_ok:
-                            st.success("삭제되었습니다. 📅 캘린더에서도 삭제됐어요!")
+                        try:
+                            delete_reservation(selected_row)
+                        except RowChangedError as e:
+                            refresh_data()
+                            st.error(f"⚠️ {e} 최신 내용을 불러왔으니 다시 확인해주세요.")
                         else:
-                            st.success("삭제되었습니다.")
-                        st.rerun()
+                            occupancy.delete_row(occupancy_key)
+                            occupancy.advance(get_data_version())
+                            # 캘린더 이벤트 삭제는 백그라운드에서
+                            cal_queued = enqueue_calendar_delete(selected_row.get('캘린더ID', ''),
+                                                                 label=str(selected_row.get('성함', '')))
+                            if cal_queued:
+                                st.success("삭제되었습니다. 📅 캘린더에서도 곧 삭제됩니다.")
+                            else:
+                                st.success("삭제되었습니다.")
+                            st.rerun()
                 with col_no:
                     if st.button("취소"):
                         st.rerun()
@@ -194,6 +287,17 @@ with tab2:
         a_checkout = a_stay_date + timedelta(days=int(a_nights))
         st.success(f"퇴실 일자: **{a_checkout.strftime('%Y-%m-%d')}** (자동계산)")
 
+    with span('page.occupancy'):
+        occupancy = get_occupancy_index(df)
+    show_overlaps(occupancy.overlaps(a_stay_date, a_nights))
+
+    with st.expander("📅 빈 날짜 찾기"):
+        free_days = st.number_input("오늘부터 며칠", 7, 365, 30, step=7, key="free_days")
+        free = occupancy.free_dates(now.date(), int(free_days))
+        st.caption(f"앞으로 {int(free_days)}일 중 빈 날짜 {len(free)}일")
+        if free:
+            st.write(', '.join(f"{d:%m/%d}({'월화수목금토일'[d.weekday()]})" for d in free))
+
     st.divider()
     col3, col4 = st.columns(2)
     with col3:
@@ -228,22 +332,6 @@ with tab2:
             stay_date = a_stay_date.strftime('%Y-%m-%d')
             checkout = a_checkout.strftime('%Y-%m-%d')
 
-            # 구글 캘린더 자동 등록 (먼저 실행해서 event_id 획득)
-            cal_ok, cal_msg = add_calendar_event(
-                name=a_name,
-                phone=a_phone,
-                adults=a_adults,
-                children=a_children,
-                bbq='O' if a_bbq else 'X',
-                bonfire='O' if a_bonfire else 'X',
-                bbq_bonfire='O' if a_bbq_bonfire else 'X',
-                pool='O' if a_pool else 'X',
-                review='O' if a_review else 'X',
-                stay_date_str=stay_date,
-                notes=a_notes
-            )
-            calendar_event_id = cal_msg if cal_ok else ''
-
             row_data = [
                 year, a_name.strip(), a_phone,
                 res_month, res_date,
@@ -254,13 +342,53 @@ with tab2:
                 'O' if a_bbq_bonfire else 'X',
                 'O' if a_pool else 'X',
                 'O' if a_review else 'X',
-                a_amount, a_notes, calendar_event_id
+                a_amount, a_notes, ''
             ]
-            add_row(row_data)
-
-            if cal_ok:
-                st.success(f"✅ {a_name} 님 예약이 추가되었습니다! 📅 캘린더에도 등록됐어요!")
+            reservation_id = add_row(row_data)
+            occupancy.add(booking_key(reservation_id, 0), a_stay_date, a_nights, label=a_name.strip())
+            occupancy.advance(get_data_version())
+
+            # 구글 캘린더 등록은 백그라운드에서 (완료되면 캘린더ID가 자동으로 채워짐)
+            event = build_event_from_row(dict(zip(COLUMNS, row_data)))
+            if event is not None:
+                enqueue_calendar_insert(reservation_id, event, label=a_name.strip())
+                st.success(f"✅ {a_name} 님 예약이 추가되었습니다! 📅 캘린더 등록은 잠시 후 자동으로 완료됩니다.")
             else:
                 st.success(f"✅ {a_name} 님 예약이 추가되었습니다!")
-                st.warning(f"캘린더 등록 실패: {cal_msg}")
+                st.warning("캘린더 등록 실패: 숙박 일자를 파싱할 수 없습니다.")
             st.balloons()
+
+# ═══════════════════════════════════════════════════════════
+# TAB 3: 일괄 가져오기 (CSV / 엑셀)
+# ═══════════════════════════════════════════════════════════
+with tab3:
+    st.subheader("예약 일괄 가져오기")
+    st.caption("예약 목록과 같은 열 이름(성함, 전화번호, 예약 일자, 숙박 일자, 숙박 일수, 인원수, 금액 ...)의 파일을 올려주세요. "
+               "성함과 숙박 일자는 필수이고, 연도·월·퇴실 일자·추가 인원수는 자동으로 계산합니다. "
+               "캘린더는 가져온 뒤 '캘린더 미등록 예약'에서 한 번에 등록할 수 있습니다.")
+    upload = st.file_uploader("CSV / 엑셀 파일", type=['csv', 'xlsx'] if xlsx_available() else ['csv'], key="import_file")
+    if upload is not None:
+        try:
+            raw = read_upload(upload)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+
+        prepared, problems = prepare_import(raw, existing=df)
+        st.markdown(f"**{len(raw)}행 중 {len(prepared)}건 추가 가능**")
+        if problems:
+            with st.expander(f"⚠️ 제외되는 행 {len(problems)}건"):
+                st.dataframe(pd.DataFrame(problems, columns=['파일 행', '사유']),
+                             use_container_width=True, hide_index=True)
+        st.dataframe(prepared, use_container_width=True, height=300)
+
+        if not prepared.empty and st.button(f"📥 {len(prepared)}건 가져오기", type="primary", key="import_run"):
+            with st.spinner("시트에 추가하는 중..."), span('page.import'):
+                new_ids = add_rows(import_rows(prepared))
+            occupancy = get_occupancy_index(df)
+            for reservation_id, stay_date, nights, name in zip(new_ids, prepared['숙박 일자'], prepared['숙박 일수'], prepared['성함']):
+                occupancy.add(booking_key(reservation_id, 0), stay_date, nights, label=name)
+            occupancy.advance(get_data_version())
+            st.success(f"✅ {len(new_ids)}건을 추가했습니다.")
+
+end_run()
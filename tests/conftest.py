@@ -0,0 +1,23 @@
+# 가짜 구글 백엔드(utils/fake_google.py) 위에서 시트 쓰기·동기화 경로를 확인하는 회귀 테스트.
+#   python -m pytest tests
+import os
+import tempfile
+
+# 스냅샷·동기화 상태를 저장소의 .cache 가 아니라 임시 폴더에 (utils.sync import 전에 정해야 함)
+os.environ.setdefault('PENSION_CACHE_DIR', tempfile.mkdtemp(prefix='pension-test-'))
+
+import pytest  # noqa: E402
+import streamlit as st  # noqa: E402
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """합성 예약 20건이 채워진 새 가짜 시트. 시트 핸들·읽기 캐시·스냅샷도 비운다"""
+    monkeypatch.setenv('FAKE_GOOGLE', 'seed_rows=20')
+    from utils import sheets, sync
+    sheets.get_fake_google.clear()
+    sheets._open_sheet.clear()
+    st.cache_data.clear()
+    sync.invalidate_snapshot()
+    sheets.refresh_data()
+    return sheets.get_fake_google()
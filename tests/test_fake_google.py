@@ -0,0 +1,131 @@
+import pytest
+
+from utils import sheets
+from utils.fake_google import FakeSpreadsheet, _sheets_error
+
+ID_COL = sheets.COLUMNS.index('예약ID') + 1   # 시트 열 (0-based, A열 = No)
+
+
+def _row(name):
+    return [2025, name, '010-0000-0000', 1, '2025-01-01', 1, '2025-01-02', 1, '2025-01-03',
+            2, 2, 0, 0, 'O', 'X', 'X', 'X', 'X', 100000, '', '', '']
+
+
+def _rows_with(ws, reservation_id):
+    return [r for r in ws.rows[1:] if len(r) > ID_COL and r[ID_COL] == reservation_id]
+
+
+def _top_no(ws):
+    return max(int(r[0]) for r in ws.rows[1:] if r and r[0].strip())
+
+
+def _other_session_row(ws, reservation_id):
+    """다른 세션이 막 붙여넣고 아직 No를 쓰지 않은 행"""
+    ws.set_values(len(ws.rows) + 1, 1, [''] + _row('다른 세션')[:-1] + [reservation_id])
+
+
+# ── WriteBatch.flush ────────────────────────────────────────
+def test_flush_resumes_after_handle_reopen(fake, monkeypatch):
+    ws = fake.worksheet
+    top = _top_no(ws)
+    original = FakeSpreadsheet.batch_update
+    failed = []
+
+    def flaky(self, body):
+        # No 기록(batchUpdate)이 한 번 404 → _with_sheet가 핸들을 다시 열고 flush를 이어서 한다
+        if not failed:
+            failed.append(body)
+            raise _sheets_error(404, 'Requested entity was not found.', 'NOT_FOUND')
+        return original(self, body)
+
+    monkeypatch.setattr(FakeSpreadsheet, 'batch_update', flaky)
+    reservation_id = sheets.add_row(_row('재시도'))
+
+    assert failed
+    assert fake.calls['values.append'] == 1
+    assert [r[0] for r in _rows_with(ws, reservation_id)] == [str(top + 1)]
+
+
+# ── No 매기기 (write_queue.next_nos) ────────────────────────
+def test_no_skips_row_appended_concurrently(fake, monkeypatch):
+    ws = fake.worksheet
+    top = _top_no(ws)
+    original = ws.append_rows
+
+    def append_after_other(values, **kwargs):
+        _other_session_row(ws, 'other')
+        return original(values, **kwargs)
+
+    monkeypatch.setattr(ws, 'append_rows', append_after_other)
+    reservation_id = sheets.add_row(_row('동시'))
+
+    # 다른 세션의 행이 top + 1 을 가져갈 것이므로 건너뜀
+    assert [r[0] for r in _rows_with(ws, reservation_id)] == [str(top + 2)]
+    assert [r[0] for r in _rows_with(ws, 'other')] == ['']
+
+
+def test_no_written_to_row_found_by_id_after_upstream_delete(fake, monkeypatch):
+    ws = fake.worksheet
+    top = _top_no(ws)
+    original = ws.batch_get
+
+    def delete_above_then_read(ranges, **kwargs):
+        # 붙여넣은 뒤 No를 쓰기 전에 다른 세션이 위쪽 행을 지우고 새 행을 붙임
+        del ws.rows[2]
+        _other_session_row(ws, 'other')
+        monkeypatch.setattr(ws, 'batch_get', original)
+        return original(ranges, **kwargs)
+
+    monkeypatch.setattr(ws, 'batch_get', delete_above_then_read)
+    ids = sheets.add_rows([_row('가'), _row('나')])
+
+    assert [_rows_with(ws, rid)[0][0] for rid in ids] == [str(top + 1), str(top + 2)]
+    assert [r[0] for r in _rows_with(ws, 'other')] == ['']
+    nos = [r[0] for r in ws.rows[1:] if r and r[0].strip()]
+    assert len(nos) == len(set(nos))
+
+
+# ── 증분 동기화 (utils/sync.py) ──────────────────────────────
+def test_delta_sync_ignores_stray_header_column(fake):
+    ws = fake.worksheet
+    # 표 오른쪽에 따로 적어 둔 메모 (헤더 없는 열 포함)
+    ws.set_values(1, len(sheets.COLUMNS) + 4, ['메모'])
+    ws.set_values(4, len(sheets.COLUMNS) + 6, ['x'])
+    ws.spreadsheet.touch()
+
+    df = sheets.load_data()
+    record = df[df['예약ID'] != ''].iloc[1]
+    sheets.update_reservation(record, [record['연도'], '수정됨'])
+    sheets.refresh_data()
+
+    fake.reset_counters()
+    df = sheets.load_data()   # 스냅샷 기준 증분 동기화 (시트 전체를 다시 받지 않아야 함)
+    assert fake.calls['values.get'] == 0
+    assert df.loc[df['예약ID'] == record['예약ID'], '성함'].tolist() == ['수정됨']
+    sheets.delete_reservation(df[df['예약ID'] == record['예약ID']].iloc[0])
+    sheets.refresh_data()
+    assert record['예약ID'] not in set(sheets.load_data()['예약ID'])
+
+
+def test_update_still_detects_real_conflict(fake):
+    ws = fake.worksheet
+    df = sheets.load_data()
+    record = df[df['예약ID'] != ''].iloc[1]
+    ws.set_values(int(record['_sheet_row']), 3, ['다른 사람'])
+    with pytest.raises(sheets.RowChangedError):
+        sheets.update_reservation(record, [record['연도'], '수정'])
+
+
+# ── 예약 위치 찾기 ───────────────────────────────────────────
+def test_locate_reservation_after_upstream_delete(fake):
+    ws = fake.worksheet
+    df = sheets.load_data()
+    record = df[df['예약ID'] != ''].iloc[5]
+    loaded_row = int(record['_sheet_row'])
+
+    del ws.rows[2]   # 다른 곳에서 위쪽 행 삭제 → 한 칸 올라감
+    ws.spreadsheet.touch()
+
+    row = sheets.locate_reservation(record)
+    assert row == loaded_row - 1
+    assert ws.rows[row - 1][ID_COL] == record['예약ID']
@@ -0,0 +1,128 @@
+import pandas as pd
+import streamlit as st
+
+from utils.sheets import local_store
+
+
+def lead_time_days(df):
+    """예약 리드타임(일) = 숙박 일자 - 예약 일자. 날짜가 없거나 음수면 NaN"""
+    days = (df['숙박 일자'] - df['예약 일자']).dt.days
+    return days.where(days >= 0)
+
+
+def lead_time_summary(lead):
+    """리드타임 Series → 건수 / 평균 / 중앙값 / 사분위 / 90% 지점"""
+    valid = lead.dropna()
+    if valid.empty:
+        return None
+    q = valid.quantile([0.25, 0.5, 0.75, 0.9])
+    return {
+        '건수': int(len(valid)),
+        '평균': valid.mean(),
+        '중앙값': q[0.5],
+        '하위 25%': q[0.25],
+        '상위 25%': q[0.75],
+        '90%': q[0.9],
+    }
+
+
+def lead_time_by_month(lead, months):
+    """숙박 월별 리드타임 분포 (1~12월 모두 포함, 데이터 없는 달은 0건)"""
+    grouped = lead.groupby(months).agg(['count', 'mean', 'median'])
+    grouped['p90'] = lead.groupby(months).quantile(0.9)
+    grouped = grouped.reindex(range(1, 13))
+    grouped['count'] = grouped['count'].fillna(0).astype(int)
+    grouped.index.name = '숙박 월'
+    return grouped.rename(columns={'count': '건수', 'mean': '평균', 'median': '중앙값', 'p90': '90%'})
+
+
+# ── 연도 × 숙박 월 집계 큐브 ─────────────────────────────────
+# 합계로 모아두는 값 (평균은 합계 / 예약수로 다시 계산)
+_CUBE_SUMS = {
+    '매출': '금액',
+    '인원수': '인원수',
+    '어른 인원수': '어른 인원수',
+    '아이 인원수': '아이 인원수',
+    '추가 인원수': '추가 인원수',
+    '숙박 일수': '숙박 일수',
+}
+
+
+def _with_means(cube):
+    cube['평균금액'] = (cube['매출'] / cube['예약수']).fillna(0)
+    if '인원수' in cube.columns:
+        cube['평균 인원수'] = (cube['인원수'] / cube['예약수']).fillna(0)
+    return cube
+
+
+def _complete_cube(cube):
+    """데이터가 있는 모든 연도 × 1~12월을 빠짐없이 채운다 (빈 달은 0)"""
+    years = sorted(cube.index.get_level_values('연도').unique().tolist())
+    # 숙박 월이 비어 있는(0) 예약도 연간 합계에는 들어가야 하므로 그대로 둔다
+    months = sorted(set(range(1, 13)) | set(cube.index.get_level_values('숙박 월').unique().tolist()))
+    full = pd.MultiIndex.from_product([years, months], names=['연도', '숙박 월'])
+    return _with_means(cube.reindex(full, fill_value=0))
+
+
+def build_month_cube(df):
+    """(연도, 숙박 월) → 예약수 / 매출 / 인원·숙박 일수 합계 / 평균"""
+    sums = {name: (col, 'sum') for name, col in _CUBE_SUMS.items() if col in df.columns}
+    cube = df.groupby(['연도', '숙박 월']).agg(예약수=('금액', 'size'), **sums)
+    return _complete_cube(cube)
+
+
+def build_month_cube_sql(store):
+    """build_month_cube와 같은 결과를 로컬 DB(reservations_clean 뷰)의 GROUP BY로"""
+    sums = ', '.join(f'SUM("{col}") AS "{name}"' for name, col in _CUBE_SUMS.items())
+    cube = store.query(
+        f'SELECT "연도", "숙박 월", COUNT(*) AS "예약수", {sums} '
+        'FROM reservations_clean GROUP BY "연도", "숙박 월"'
+    ).set_index(['연도', '숙박 월'])
+    return _complete_cube(cube)
+
+
+def get_month_cube(df):
+    """load_data 결과에 대한 집계 큐브. 데이터 버전마다 한 번만 계산"""
+    version = df.attrs.get('data_version')
+    if version is None:
+        return build_month_cube(df)
+    return _cached_month_cube(df, version)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _cached_month_cube(_df, data_version):
+    store = local_store() if _df.attrs.get('local_db') else None
+    if store is not None:
+        return build_month_cube_sql(store)
+    return build_month_cube(_df)
+
+
+def cube_month(cube, year, month):
+    """특정 연도·월 집계 한 줄 (없는 연도면 전부 0)"""
+    if (year, month) in cube.index:
+        return cube.loc[(year, month)]
+    return pd.Series(0, index=cube.columns)
+
+
+def cube_year_months(cube, year):
+    """특정 연도의 1~12월 집계 (열 '숙박 월', '월_표시' 포함)"""
+    if year in cube.index.get_level_values(0):
+        months = cube.xs(year, level='연도').reindex(range(1, 13), fill_value=0)
+    else:
+        months = pd.DataFrame(0, index=pd.Index(range(1, 13), name='숙박 월'), columns=cube.columns)
+    months = months.reset_index()
+    months['월_표시'] = months['숙박 월'].astype(str) + '월'
+    return months
+
+
+def cube_years(cube):
+    """연도별 합계 (평균은 연간 기준으로 다시 계산)"""
+    sums = cube.drop(columns=[c for c in ['평균금액', '평균 인원수'] if c in cube.columns])
+    return _with_means(sums.groupby(level='연도').sum())
+
+
+def cube_year(cube, year):
+    years = cube_years(cube)
+    if year in years.index:
+        return years.loc[year]
+    return pd.Series(0, index=years.columns)
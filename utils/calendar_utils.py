@@ -1,7 +1,18 @@
-from googleapiclient.discovery import build
+import hashlib
+import json
+import threading
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.errors import HttpError
 from google.oauth2.service_account import Credentials
-import streamlit as st
 import pandas as pd
+import streamlit as st
+
+from utils.dates import parse_date
+from utils.perf import api_call
+from utils.sheets import get_fake_google, is_checked
+from utils.sync import CACHE_DIR
 
 CALENDAR_ID = "263d65a20eca6fde95edc2631d7c75aee874715603032eacb82aa37c98970122@group.calendar.google.com"
 
@@ -12,85 +23,423 @@ SCOPES = [
 ]
 
 
-def get_calendar_service():
-    creds = Credentials.from_service_account_info(
+@st.cache_resource
+def _get_credentials():
+    return Credentials.from_service_account_info(
         st.secrets["gcp_service_account"],
         scopes=SCOPES
     )
-    return build('calendar', 'v3', credentials=creds)
 
 
-def normalize_date(date_str):
-    s = str(date_str).strip()
-    if not s or s in ['0', 'nan', '']:
+@st.cache_resource
+def get_calendar_service():
+    fake = get_fake_google()
+    if fake is not None:
+        return fake.calendar
+    # discovery 모듈은 무거우므로 캘린더를 처음 쓸 때 import (페이지 첫 로딩에는 필요 없음)
+    from googleapiclient.discovery import build, build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+
+    # google-api-python-client에 포함된 정적 디스커버리 문서로 한 번만 생성 → 디스커버리 요청 없음
+    doc = get_static_doc('calendar', 'v3')
+    if doc is None:
+        return build('calendar', 'v3', credentials=_get_credentials(), cache_discovery=False)
+    return build_from_document(doc, credentials=_get_credentials())
+
+
+def _api_name(method, uri):
+    """요청 URI → 'events.list', 'events.insert', 'batch' 같은 API 메서드 이름"""
+    path = uri.split('?', 1)[0].rstrip('/')
+    if path.endswith('/batch') or '/batch/' in path:
+        return 'batch'
+    if path.endswith('/events'):
+        return 'events.list' if method == 'GET' else 'events.insert'
+    if '/events/' in path:
+        return {'GET': 'events.get', 'PATCH': 'events.patch', 'PUT': 'events.update',
+                'DELETE': 'events.delete'}.get(method, 'events.' + method.lower())
+    return 'calendar.' + method.lower()
+
+
+class _TimedHttp(AuthorizedHttp):
+    """모든 캘린더 요청의 시간, 응답 크기, 할당량 오류를 utils/perf.py에 기록"""
+
+    def request(self, uri, method='GET', *args, **kwargs):
+        with api_call(_api_name(method, uri)) as info:
+            response, content = super().request(uri, method, *args, **kwargs)
+            info['status'] = response.status
+            info['bytes'] = len(content or b'')
+            info['quota'] = response.status == 429 or (
+                response.status == 403 and b'ateLimitExceeded' in (content or b''))
+            return response, content
+
+
+# 서비스 객체는 세션 간에 공유되지만 httplib2 연결은 스레드 안전하지 않으므로 스레드마다 따로 둔다
+_http_local = threading.local()
+
+
+def _http():
+    if get_fake_google() is not None:
         return None
-    parts = s.replace('/', '-').split('-')
-    if len(parts) == 3 and len(parts[0]) == 2:
-        s = '20' + s
-    result = pd.to_datetime(s, errors='coerce')
-    return result if not pd.isna(result) else None
+    http = getattr(_http_local, 'http', None)
+    if http is None:
+        http = _TimedHttp(_get_credentials(), http=httplib2.Http())
+        _http_local.http = http
+    return http
 
 
-def is_checked(value):
-    return str(value).strip().upper() in ['O', 'Y', 'YES', '예', 'TRUE', '1']
+def build_event(name, phone, adults, children, bbq, bonfire, bbq_bonfire, pool, review, stay_date_str, notes='',
+                nights=1):
+    """예약 정보 → Calendar 이벤트 body (숙박 일자를 파싱할 수 없으면 None)"""
+    date = parse_date(stay_date_str)
+    if date is None:
+        return None
 
+    date_str = date.strftime('%Y-%m-%d')
+    # 종일 이벤트의 end는 다음 날(미포함) → 퇴실 일자로 두면 숙박한 밤이 모두 표시됨
+    nights = max(1, int(nights or 1))
+    end_str = (date + pd.Timedelta(days=nights)).strftime('%Y-%m-%d')
 
-def add_calendar_event(name, phone, adults, children, bbq, bonfire, bbq_bonfire, pool, review, stay_date_str, notes=''):
-    try:
-        service = get_calendar_service()
+    # 제목
+    title = f"{name} (성인 {int(adults)}명 / 아이 {int(children)}명)"
 
-        date = normalize_date(stay_date_str)
-        if date is None:
+    # 체크된 서비스만 표시
+    services = []
+    if is_checked(bbq):
+        services.append("🍖 바비큐")
+    if is_checked(bonfire):
+        services.append("🔥 불멍")
+    if is_checked(bbq_bonfire):
+        services.append("🍖🔥 바비큐+불멍")
+    if is_checked(pool):
+        services.append("🏊 수영장")
+    if is_checked(review):
+        services.append("⭐ 리뷰이벤트")
+
+    description = (
+        f"📞 전화번호: {phone}\n"
+        f"👨‍👩‍👧 성인: {int(adults)}명 / 아이: {int(children)}명"
+    )
+    if services:
+        description += "\n\n" + " / ".join(services)
+    if notes and str(notes).strip() and str(notes).strip() != 'nan':
+        description += f"\n\n📝 비고: {str(notes).strip()}"
+
+    return {
+        'summary': title,
+        'description': description,
+        'start': {'date': date_str},
+        'end': {'date': end_str},
+    }
+
+
+def build_event_from_row(row):
+    """load_data 한 행(Series) → Calendar 이벤트 body"""
+    return build_event(
+        name=row.get('성함', ''),
+        phone=row.get('전화번호', ''),
+        adults=row.get('어른 인원수', 0),
+        children=row.get('아이 인원수', 0),
+        bbq=row.get('바비큐 1', ''),
+        bonfire=row.get('불멍', ''),
+        bbq_bonfire=row.get('바비큐+불멍', ''),
+        pool=row.get('수영장 사용', ''),
+        review=row.get('리뷰이벤트', ''),
+        stay_date_str=row.get('숙박 일자', ''),
+        notes=row.get('비고', ''),
+        nights=row.get('숙박 일수', 1),
+    )
+
+
+def tag_event(event, reservation_id):
+    """이벤트에 예약ID를 숨겨 둠 (extendedProperties) → 시트에 캘린더ID가 기록되기 전에도 어느 예약의 이벤트인지 안다"""
+    if not reservation_id:
+        return event
+    return dict(event, extendedProperties={'private': {'reservation_id': str(reservation_id)}})
+
+
+def event_owner(event):
+    """tag_event로 심어 둔 예약ID (없으면 '')"""
+    return ((event or {}).get('extendedProperties') or {}).get('private', {}).get('reservation_id', '')
+
+
+def insert_event(event, reservation_id=''):
+    """이벤트 생성 후 event_id 반환 (실패 시 예외 그대로 전달)"""
+    service = get_calendar_service()
+    body = tag_event(event, reservation_id)
+    result = service.events().insert(calendarId=CALENDAR_ID, body=body).execute(http=_http())
+    event_id = result.get('id', '')
+    _remember_synced({event_id: event_fingerprint(event)}, owners={event_id: reservation_id} if reservation_id else None)
+    return event_id
+
+
+def remove_event(event_id):
+    """이벤트 삭제 (실패 시 예외 그대로 전달)"""
+    service = get_calendar_service()
+    event_id = str(event_id).strip()
+    service.events().delete(calendarId=CALENDAR_ID, eventId=event_id).execute(http=_http())
+    _remember_synced({}, forget=[event_id])
+
+
+def add_calendar_event(name, phone, adults, children, bbq, bonfire, bbq_bonfire, pool, review, stay_date_str, notes='',
+                       nights=1):
+    try:
+        event = build_event(name, phone, adults, children, bbq, bonfire, bbq_bonfire,
+                            pool, review, stay_date_str, notes, nights)
+        if event is None:
             return False, "숙박 일자를 파싱할 수 없습니다."
 
-        date_str = date.strftime('%Y-%m-%d')
-
-        # 제목
-        title = f"{name} (성인 {int(adults)}명 / 아이 {int(children)}명)"
-
-        # 체크된 서비스만 표시
-        services = []
-        if is_checked(bbq):
-            services.append("🍖 바비큐")
-        if is_checked(bonfire):
-            services.append("🔥 불멍")
-        if is_checked(bbq_bonfire):
-            services.append("🍖🔥 바비큐+불멍")
-        if is_checked(pool):
-            services.append("🏊 수영장")
-        if is_checked(review):
-            services.append("⭐ 리뷰이벤트")
-
-        description = (
-            f"📞 전화번호: {phone}\n"
-            f"👨‍👩‍👧 성인: {int(adults)}명 / 아이: {int(children)}명"
-        )
-        if services:
-            description += "\n\n" + " / ".join(services)
-        if notes and str(notes).strip() and str(notes).strip() != 'nan':
-            description += f"\n\n📝 비고: {str(notes).strip()}"
-
-        event = {
-            'summary': title,
-            'description': description,
-            'start': {'date': date_str},
-            'end': {'date': date_str},
-        }
-
-        result = service.events().insert(calendarId=CALENDAR_ID, body=event).execute()
-        event_id = result.get('id', '')
-        return True, event_id
+        return True, insert_event(event)
 
     except Exception as e:
         return False, str(e)
 
 
-def delete_calendar_event(event_id):
+def update_calendar_event(event_id, event):
+    """기존 이벤트 내용을 event(build_event 결과)로 교체"""
     try:
         if not event_id or str(event_id).strip() in ['', 'nan']:
             return False, "캘린더ID 없음"
+        if event is None:
+            return False, "숙박 일자를 파싱할 수 없습니다."
         service = get_calendar_service()
-        service.events().delete(calendarId=CALENDAR_ID, eventId=str(event_id).strip()).execute()
+        event_id = str(event_id).strip()
+        service.events().patch(calendarId=CALENDAR_ID, eventId=event_id, body=event).execute(http=_http())
+        _remember_synced({event_id: event_fingerprint(event)})
+        return True, "캘린더 수정 완료"
+    except Exception as e:
+        return False, str(e)
+
+
+def delete_calendar_event(event_id):
+    try:
+        if not event_id or str(event_id).strip() in ['', 'nan']:
+            return False, "캘린더ID 없음"
+        remove_event(event_id)
         return True, "캘린더 삭제 완료"
     except Exception as e:
         return False, str(e)
+
+
+# ── 캘린더 이벤트 일괄 생성 (백필) ────────────────────────────
+# Calendar 배치 엔드포인트는 HTTP 요청 1회에 최대 50건
+BATCH_SIZE = 50
+
+
+def missing_calendar_rows(df):
+    """캘린더ID가 비어 있는 예약 행"""
+    if '캘린더ID' not in df.columns:
+        return df.iloc[:0]
+    ids = df['캘린더ID'].astype(str).str.strip()
+    return df[ids.isin(['', 'nan', 'None']) | df['캘린더ID'].isna()]
+
+
+def run_batch(calls):
+    """calls: [(key, request), ...] → ({key: 응답}, {key: 오류 메시지}).
+    HTTP 요청 1회에 최대 BATCH_SIZE건씩 묶어서 실행"""
+    service = get_calendar_service()
+    results = {}
+    failures = {}
+    keys = {}
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            failures[keys[request_id]] = str(exception)
+        else:
+            results[keys[request_id]] = response
+
+    for start in range(0, len(calls), BATCH_SIZE):
+        chunk = calls[start:start + BATCH_SIZE]
+        batch = service.new_batch_http_request(callback=on_response)
+        for i, (key, request) in enumerate(chunk, start):
+            keys[str(i)] = key
+            batch.add(request, request_id=str(i))
+        try:
+            batch.execute(http=_http())
+        except Exception as e:
+            for key, _ in chunk:
+                if key not in results and key not in failures:
+                    failures[key] = str(e)
+    return results, failures
+
+
+def backfill_calendar_events(rows):
+    """rows(load_data 형식)의 이벤트를 배치 요청으로 생성.
+    반환: ({예약ID: event_id}, [(성함, 오류 메시지), ...])"""
+    service = get_calendar_service()
+    errors = []
+    names = {}
+    events = {}
+    for _, row in rows.iterrows():
+        event = build_event_from_row(row)
+        if event is None:
+            errors.append((row.get('성함', ''), "숙박 일자를 파싱할 수 없습니다."))
+            continue
+        reservation_id = row['예약ID']
+        names[reservation_id] = row.get('성함', '')
+        events[reservation_id] = tag_event(event, reservation_id)
+
+    results, failures = run_batch([
+        (reservation_id, service.events().insert(calendarId=CALENDAR_ID, body=event))
+        for reservation_id, event in events.items()
+    ])
+    created = {reservation_id: response.get('id', '') for reservation_id, response in results.items()}
+    _remember_synced({event_id: event_fingerprint(events[reservation_id]) for reservation_id, event_id in created.items()},
+                     owners={event_id: reservation_id for reservation_id, event_id in created.items()})
+    errors += [(names[reservation_id], msg) for reservation_id, msg in failures.items()]
+    return created, errors
+
+
+# ── 시트 ↔ 캘린더 동기화 (syncToken 기반 증분) ───────────────
+SYNC_STATE_PATH = CACHE_DIR / 'calendar_sync.json'
+
+# 이벤트 내용 중 시트에서 만들어지는 부분만 비교
+_SYNCED_FIELDS = ['summary', 'description', 'start', 'end']
+
+
+@st.cache_resource
+def _sync_lock():
+    return threading.Lock()
+
+
+def _read_sync_state():
+    # 가짜 캘린더(utils/fake_google.py)는 프로세스마다 새로 시작하므로 상태도 그 안에만 둔다
+    fake = get_fake_google()
+    try:
+        if fake is not None:
+            return json.loads(fake.calendar.sync_state or 'null') or {'sync_token': None, 'synced': {}}
+        return json.loads(SYNC_STATE_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {'sync_token': None, 'synced': {}}
+
+
+def _write_sync_state(state):
+    fake = get_fake_google()
+    if fake is not None:
+        fake.calendar.sync_state = json.dumps(state, ensure_ascii=False)
+        return
+    try:
+        SYNC_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        SYNC_STATE_PATH.write_text(json.dumps(state, ensure_ascii=False), encoding='utf-8')
+    except OSError:
+        pass
+
+
+def event_fingerprint(event):
+    body = {k: event.get(k) for k in _SYNCED_FIELDS}
+    return hashlib.sha1(json.dumps(body, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _remember_synced(fingerprints, forget=(), owners=None):
+    """이 프로세스가 캘린더에 직접 반영한 이벤트 내용을 기록 → 다음 동기화 때 다시 보내지 않음.
+    owners: {event_id: 예약ID} — 시트에 캘린더ID가 기록되기 전에 동기화가 돌아도 지우지 않도록"""
+    if not fingerprints and not forget:
+        return
+    with _sync_lock():
+        state = _read_sync_state()
+        state['synced'].update(fingerprints)
+        state.setdefault('owners', {}).update(owners or {})
+        for event_id in forget:
+            state['synced'].pop(event_id, None)
+            state['owners'].pop(event_id, None)
+        _write_sync_state(state)
+
+
+def _list_changed_events(sync_token):
+    """syncToken 이후 바뀐 이벤트만 조회 (토큰이 없거나 만료되면 전체 조회).
+    반환: ({event_id: event}, 다음 syncToken)"""
+    service = get_calendar_service()
+    changed = {}
+    page_token = None
+    full = sync_token is None
+    while True:
+        params = {'calendarId': CALENDAR_ID, 'maxResults': 2500, 'pageToken': page_token,
+                  'showDeleted': True}
+        if not full:
+            params['syncToken'] = sync_token
+        try:
+            response = service.events().list(**params).execute(http=_http())
+        except HttpError as e:
+            if e.resp.status == 410 and not full:
+                # 토큰 만료 → 전체 다시 조회
+                return _list_changed_events(None)
+            raise
+        for event in response.get('items', []):
+            changed[event['id']] = event
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return changed, response.get('nextSyncToken')
+
+
+def reconcile_calendar(df):
+    """시트(기준) ↔ 캘린더 맞추기.
+    - 캘린더에서 바뀌었거나 시트에서 수정된 이벤트 → patch
+    - 캘린더에서 지워진 이벤트 → 다시 생성
+    - 시트에서 지워진 예약의 이벤트 → 삭제
+    반환: {'patched': n, 'created': {예약ID: 새 event_id}, 'deleted': n, 'errors': [...]}"""
+    service = get_calendar_service()
+    with _sync_lock():
+        state = _read_sync_state()
+        changed, next_token = _list_changed_events(state.get('sync_token'))
+        synced = state.get('synced', {})
+        owners = dict(state.get('owners', {}))
+        owners.update({event_id: event_owner(event) for event_id, event in changed.items() if event_owner(event)})
+
+        desired = {}   # event_id → (예약ID, event body)
+        missing = missing_calendar_rows(df)
+        for _, row in df[~df.index.isin(missing.index)].iterrows():
+            event = build_event_from_row(row)
+            if event is not None:
+                desired[str(row['캘린더ID']).strip()] = (row['예약ID'], tag_event(event, row['예약ID']))
+        # 작업 스레드가 이벤트를 만들었지만 시트에 캘린더ID를 아직 기록하지 못한 예약 → 그 이벤트는 지우지 않음
+        pending = {str(v).strip() for v in missing.get('예약ID', [])} - {''}
+
+        calls = []
+        for event_id, (reservation_id, event) in desired.items():
+            remote = changed.get(event_id)
+            if remote is not None and remote.get('status') == 'cancelled':
+                calls.append((('create', event_id, reservation_id),
+                               service.events().insert(calendarId=CALENDAR_ID, body=event)))
+            elif (synced.get(event_id) != event_fingerprint(event)
+                  or (remote is not None and event_fingerprint(remote) != event_fingerprint(event))):
+                calls.append((('patch', event_id, reservation_id),
+                               service.events().patch(calendarId=CALENDAR_ID, eventId=event_id, body=event)))
+        kept = {event_id for event_id in set(synced) - set(desired) if owners.get(event_id) in pending}
+        for event_id in set(synced) - set(desired) - kept:
+            if changed.get(event_id, {}).get('status') != 'cancelled':
+                calls.append((('delete', event_id, None),
+                               service.events().delete(calendarId=CALENDAR_ID, eventId=event_id)))
+
+        results, failures = run_batch(calls)
+
+        summary = {'patched': 0, 'created': {}, 'deleted': 0, 'errors': []}
+        new_synced = {}
+        recreated = {event_id for action, event_id, _ in (key for key, _ in calls) if action == 'create'}
+        for event_id, (reservation_id, event) in desired.items():
+            if event_id not in recreated and synced.get(event_id) == event_fingerprint(event):
+                new_synced[event_id] = synced[event_id]
+        for event_id in kept:
+            new_synced[event_id] = synced[event_id]
+        for (action, event_id, reservation_id), response in results.items():
+            if action == 'create':
+                new_id = response.get('id', '')
+                summary['created'][reservation_id] = new_id
+                new_synced[new_id] = event_fingerprint(desired[event_id][1])
+                owners[new_id] = reservation_id
+            elif action == 'patch':
+                summary['patched'] += 1
+                new_synced[event_id] = event_fingerprint(desired[event_id][1])
+            else:
+                summary['deleted'] += 1
+        for (action, event_id, _), msg in failures.items():
+            if action == 'delete' and ('404' in msg or '410' in msg):
+                continue   # 이미 없는 이벤트
+            if action == 'delete':
+                new_synced[event_id] = synced[event_id]   # 다음 번에 다시 시도
+            summary['errors'].append(f"{event_id}: {msg}")
+
+        # 재생성에 실패한 이벤트가 있으면 토큰을 넘기지 않아 다음 번에 다시 삭제 내역을 받는다
+        if any(action == 'create' for action, _, _ in failures):
+            next_token = state.get('sync_token')
+        _write_sync_state({'sync_token': next_token, 'synced': new_synced,
+                           'owners': {event_id: owners[event_id] for event_id in new_synced if event_id in owners}})
+    return summary
@@ -0,0 +1,112 @@
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import gspread
+import httplib2
+import requests
+import streamlit as st
+from googleapiclient.errors import HttpError
+
+from utils.calendar_utils import insert_event, remove_event
+from utils.sheets import set_calendar_id
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0    # 초. 재시도 간격 = BACKOFF_BASE * 2^(시도-1) + 지터
+BACKOFF_MAX = 60.0
+
+# 잠시 후 다시 하면 될 수 있는 오류: 할당량 초과(429/403 rateLimit), 서버 오류(5xx).
+# 캘린더(HttpError)뿐 아니라 캘린더ID 기록(set_calendar_id)의 시트 오류(APIError)도 같은 기준
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+_RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+
+def _is_retryable(e):
+    if isinstance(e, HttpError):
+        status = e.resp.status
+        if status in _RETRY_STATUS:
+            return True
+        return status == 403 and any(r in str(e) for r in _RATE_LIMIT_REASONS)
+    if isinstance(e, gspread.exceptions.APIError):
+        return e.code in _RETRY_STATUS
+    return isinstance(e, (OSError, TimeoutError, httplib2.HttpLib2Error, requests.exceptions.RequestException))
+
+
+def _is_gone(e):
+    return isinstance(e, HttpError) and e.resp.status in (404, 410)
+
+
+def _backoff(attempt):
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)) + random.uniform(0, BACKOFF_BASE)
+
+
+class CalendarWorker:
+    """캘린더 생성/삭제를 백그라운드 스레드에서 처리 (프로세스당 하나).
+    예약 저장은 시트 쓰기만 끝나면 바로 돌아가고, 이벤트 ID는 생성되는 대로 시트에 채워진다."""
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.failures = deque(maxlen=50)
+        self._thread = threading.Thread(target=self._run, name='calendar-worker', daemon=True)
+        self._thread.start()
+
+    def pending(self):
+        return self.jobs.unfinished_tasks
+
+    def submit(self, job):
+        self.jobs.put(job)
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                self._process(job)
+            finally:
+                self.jobs.task_done()
+
+    def _process(self, job):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                self._step(job)
+                return
+            except Exception as e:
+                if job['action'] == 'delete' and _is_gone(e):
+                    return
+                if attempt == MAX_ATTEMPTS or not _is_retryable(e):
+                    self.failures.append({
+                        '시각': datetime.now().strftime('%H:%M:%S'),
+                        '작업': '등록' if job['action'] == 'insert' else '삭제',
+                        '예약': job.get('label', ''),
+                        '오류': str(e),
+                    })
+                    return
+                time.sleep(_backoff(attempt))
+
+    def _step(self, job):
+        if job['action'] == 'insert':
+            # 이벤트가 이미 만들어졌으면 (시트 기록만 실패한 경우) 다시 만들지 않음
+            if not job.get('event_id'):
+                job['event_id'] = insert_event(job['event'], job['reservation_id'])
+            set_calendar_id(job['reservation_id'], job['event_id'])
+        else:
+            remove_event(job['event_id'])
+
+
+@st.cache_resource
+def get_calendar_worker():
+    return CalendarWorker()
+
+
+def enqueue_calendar_insert(reservation_id, event, label=''):
+    """예약의 이벤트 생성을 예약. 완료되면 해당 예약ID 행의 캘린더ID가 채워진다"""
+    get_calendar_worker().submit({'action': 'insert', 'reservation_id': reservation_id, 'event': event, 'label': label})
+
+
+def enqueue_calendar_delete(event_id, label=''):
+    if not event_id or str(event_id).strip() in ['', 'nan']:
+        return False
+    get_calendar_worker().submit({'action': 'delete', 'event_id': str(event_id).strip(), 'label': label})
+    return True
@@ -0,0 +1,156 @@
+# 대시보드 / 매출분석 페이지의 Plotly 그래프.
+# plotly.express는 import만 0.1초 가까이 걸리므로 모듈 맨 위가 아니라 그래프를 처음 만들 때 import한다
+# (예약관리 페이지나 데이터가 없는 화면에서는 올라오지 않음).
+#
+# 페이지에서는 get_figure로 가져온다: 데이터 버전 × 연도 × 그래프 종류마다 한 번만 만들고
+# 모든 세션이 같은 Figure를 함께 쓴다 (표시 건수 슬라이더처럼 다른 위젯만 바뀐 재실행에서는 다시 만들지 않음).
+# 공유 객체이므로 받은 Figure를 고치지 말 것.
+# JSON이 아니라 Figure를 보관하는 이유: st.plotly_chart는 dict를 받으면 Figure로 다시 만들어 검증하므로 더 느리다.
+import streamlit as st
+
+# 보관할 그래프 수. 넘치면 가장 오래 안 쓴 것부터 버린다 (st.cache_resource max_entries는 LRU)
+FIGURE_CACHE_SIZE = 64
+
+
+def get_figure(df, kind, year, data):
+    """load_data 결과(df)의 데이터 버전·연도마다 한 번만 만든 kind 그래프.
+    data는 그래프에 넣을 값으로, 같은 데이터 버전·연도면 항상 같아야 한다 (연도와 무관하면 year=None)"""
+    version = df.attrs.get('data_version')
+    if version is None:
+        return BUILDERS[kind](data)
+    return _cached_figure(version, year, kind, data)
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def _cached_figure(data_version, year, kind, _data):
+    return BUILDERS[kind](_data)
+
+
+# ── 대시보드 ────────────────────────────────────────────────
+def monthly_revenue_bar(monthly):
+    """월별 매출 막대"""
+    import plotly.express as px
+
+    fig = px.bar(monthly, x='월_표시', y='매출', text='매출',
+                 color_discrete_sequence=['#FF6B6B'])
+    fig.update_traces(texttemplate='₩%{text:,.0f}', textposition='outside')
+    fig.update_layout(showlegend=False, xaxis_title='', yaxis_title='매출(원)', height=320)
+    return fig
+
+
+def service_pie(service_df):
+    """추가 서비스 이용 횟수 도넛"""
+    import plotly.express as px
+
+    fig = px.pie(service_df, names='서비스', values='이용횟수',
+                 color_discrete_sequence=px.colors.qualitative.Pastel, hole=0.4)
+    fig.update_layout(height=320)
+    return fig
+
+
+def guest_line(monthly):
+    """월별 평균 인원수 선"""
+    import plotly.express as px
+
+    fig = px.line(monthly, x='월_표시', y='평균 인원수',
+                  markers=True, color_discrete_sequence=['#4ECDC4'])
+    fig.update_layout(xaxis_title='', yaxis_title='평균 인원수(명)', height=320)
+    return fig
+
+
+def guest_mix_bar(monthly):
+    """월별 어른 / 아이 / 추가인원 누적 막대"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    colors = {'어른 인원수': '#45B7D1', '아이 인원수': '#FF6B6B', '추가 인원수': '#96CEB4'}
+    labels = {'어른 인원수': '어른', '아이 인원수': '아이', '추가 인원수': '추가인원'}
+    for col in colors:
+        fig.add_trace(go.Bar(
+            x=monthly['월_표시'], y=monthly[col],
+            name=labels[col], marker_color=colors[col]
+        ))
+    fig.update_layout(barmode='stack', xaxis_title='', yaxis_title='인원수(명)',
+                      height=320, legend=dict(orientation='h', yanchor='bottom', y=1.02))
+    return fig
+
+
+# ── 매출분석 ────────────────────────────────────────────────
+def monthly_trend(monthly):
+    """월별 매출(막대) + 예약수(선, 오른쪽 축)"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=monthly['월_표시'], y=monthly['매출'],
+        name='매출(원)', marker_color='#FF6B6B',
+        text=monthly['매출'].apply(lambda x: f'₩{x:,.0f}' if x > 0 else ''),
+        textposition='outside', yaxis='y1'
+    ))
+    fig.add_trace(go.Scatter(
+        x=monthly['월_표시'], y=monthly['예약수'],
+        name='예약수', line=dict(color='#4ECDC4', width=2),
+        mode='lines+markers', yaxis='y2'
+    ))
+    fig.update_layout(
+        yaxis=dict(title='매출(원)', showgrid=False),
+        yaxis2=dict(title='예약수', overlaying='y', side='right'),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02),
+        hovermode='x unified',
+        height=400
+    )
+    return fig
+
+
+def yearly_revenue_bar(yearly):
+    """연도별 매출 막대. yearly: 연도(문자열), 매출"""
+    import plotly.express as px
+
+    fig = px.bar(
+        yearly, x='연도', y='매출',
+        text='매출', color_discrete_sequence=['#45B7D1']
+    )
+    fig.update_traces(texttemplate='₩%{text:,.0f}', textposition='outside')
+    fig.update_layout(
+        showlegend=False, xaxis_title='', yaxis_title='매출(원)', height=350,
+        xaxis=dict(type='category', tickmode='array', tickvals=yearly['연도'].tolist())
+    )
+    return fig
+
+
+def service_rate_bar(service_df):
+    """추가 서비스 이용률 막대"""
+    import plotly.express as px
+
+    fig = px.bar(
+        service_df, x='서비스', y='이용률(%)',
+        text='이용률(%)', color_discrete_sequence=['#96CEB4']
+    )
+    fig.update_traces(texttemplate='%{text}%', textposition='outside')
+    fig.update_layout(showlegend=False, yaxis_title='이용률(%)', xaxis_title='', height=350)
+    return fig
+
+
+def guest_histogram(df_year):
+    """예약별 인원수 분포"""
+    import plotly.express as px
+
+    fig = px.histogram(
+        df_year, x='인원수', nbins=10,
+        color_discrete_sequence=['#FFEAA7'],
+        labels={'인원수': '인원수', 'count': '예약 수'}
+    )
+    fig.update_layout(xaxis_title='인원수(명)', yaxis_title='예약 수', height=300)
+    return fig
+
+
+BUILDERS = {
+    'monthly_revenue': monthly_revenue_bar,
+    'service_pie': service_pie,
+    'guest_line': guest_line,
+    'guest_mix': guest_mix_bar,
+    'monthly_trend': monthly_trend,
+    'yearly_revenue': yearly_revenue_bar,
+    'service_rate': service_rate_bar,
+    'guest_histogram': guest_histogram,
+}
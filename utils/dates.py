@@ -0,0 +1,56 @@
+import pandas as pd
+
+_BLANKS = ['', '0', 'nan', 'NaN', 'None', 'NaT']
+
+# 문자열 → Timestamp 메모 (프로세스 전역). 같은 날짜 문자열은 한 번만 파싱
+_MEMO = {}
+_MEMO_MAX = 100_000
+_MISSING = object()
+
+
+def _parse_strings(s):
+    s = s.str.strip().str.replace('/', '-', regex=False)
+    s = s.where(~s.isin(_BLANKS))
+    s = s.str.replace(r'^(\d{2})-(\d{1,2})-(\d{1,2})', r'20\1-\2-\3', regex=True)
+
+    parsed = pd.to_datetime(s, format='%Y-%m-%d', errors='coerce')
+    # 시각이 붙은 값이나 '2025. 3. 1' 같은 표시 형식은 개별 파싱으로 한 번 더 시도
+    rest = parsed.isna() & s.notna()
+    if rest.any():
+        parsed[rest] = pd.to_datetime(s[rest], format='mixed', errors='coerce')
+    return parsed
+
+
+def parse_dates(series):
+    """날짜 문자열 Series → datetime64 Series (파싱 불가/빈 값/'0'은 NaT)
+
+    'YYYY-MM-DD', 'YY-MM-DD'(20YY로 간주), 'YYYY/MM/DD' 모두 처리.
+    고유한 문자열만 한 번씩 파싱한 뒤 전체 행에 펼친다."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    codes, uniques = pd.factorize(series.astype(str).fillna(''))
+
+    lookup = {u: _MEMO.get(u, _MISSING) for u in uniques}
+    missing = [u for u, v in lookup.items() if v is _MISSING]
+    if missing:
+        parsed = _parse_strings(pd.Series(missing, dtype=str)).tolist()
+        lookup.update(zip(missing, parsed))
+        if len(_MEMO) + len(missing) > _MEMO_MAX:
+            _MEMO.clear()
+        _MEMO.update(zip(missing, parsed))
+
+    values = pd.DatetimeIndex([lookup[u] for u in uniques], dtype='datetime64[ns]').take(codes)
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def parse_date(value):
+    """단일 값 → Timestamp (없거나 파싱 불가면 None)"""
+    result = parse_dates(pd.Series([value])).iloc[0]
+    return None if pd.isna(result) else result
+
+
+def format_date(value):
+    """Timestamp/날짜 → 'YYYY-MM-DD' (없으면 빈 문자열)"""
+    if value is None or pd.isna(value):
+        return ''
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
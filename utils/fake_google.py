@@ -0,0 +1,482 @@
+# 구글 시트/캘린더 대신 쓰는 메모리 안의 가짜 서버 (테스트·벤치마크용).
+# 앱이 실제로 호출하는 gspread 워크시트 메서드와 Calendar events 메서드만 흉내 낸다.
+# 호출마다 지연(latency)과 할당량 오류(429 / 403 rateLimitExceeded)를 넣을 수 있고,
+# 호출 횟수는 FakeGoogle.calls 에 쌓인다.
+#
+# 설정 (둘 중 하나, 환경 변수가 우선)
+#   secrets.toml    [fake_google]
+#                   enabled = true
+#                   latency = 0.05            # 호출당 지연(초)
+#                   quota_error_rate = 0.01   # 호출이 할당량 오류로 실패할 확률
+#                   seed_rows = 1000          # 처음에 채워 둘 합성 예약 수 (benchmarks/synthetic.py)
+#   환경 변수       FAKE_GOOGLE="latency=0.05,quota_error_rate=0.01,seed_rows=1000"
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+import gspread
+import requests
+from gspread.cell import Cell
+
+from utils.perf import api_call
+
+
+def fake_google_config(secrets=None):
+    """설정이 없거나 꺼져 있으면 None"""
+    env = os.environ.get('FAKE_GOOGLE')
+    if env is not None:
+        if env.strip().lower() in ('', '0', 'false', 'off'):
+            return None
+        config = {}
+        for part in env.split(','):
+            if '=' in part:
+                key, value = part.split('=', 1)
+                config[key.strip()] = value.strip()
+        return _normalize(config)
+    section = dict((secrets or {}).get('fake_google', {}))
+    if not section.get('enabled'):
+        return None
+    return _normalize(section)
+
+
+def _normalize(config):
+    return {
+        'latency': float(config.get('latency', 0)),
+        'quota_error_rate': float(config.get('quota_error_rate', 0)),
+        'seed_rows': int(config.get('seed_rows', 0)),
+        'seed': int(config.get('seed', 0)),
+    }
+
+
+# ── 오류 ─────────────────────────────────────────────────────
+def _sheets_error(code, message, status):
+    response = requests.Response()
+    response.status_code = code
+    response._content = json.dumps({'error': {'code': code, 'message': message, 'status': status}}).encode()
+    return gspread.exceptions.APIError(response)
+
+
+def _calendar_error(code, reason, message):
+    # 캘린더 쪽 라이브러리는 가짜 캘린더를 실제로 쓸 때만 import (시트만 쓰는 페이지의 첫 로딩을 가볍게)
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    content = json.dumps({'error': {'code': code, 'message': message,
+                                    'errors': [{'reason': reason, 'message': message}]}}).encode()
+    return HttpError(httplib2.Response({'status': code}), content)
+
+
+# ── A1 표기 ──────────────────────────────────────────────────
+_A1 = re.compile(r"^(?:'?[^!]*'?!)?([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def _col_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - ord('A') + 1
+    return n
+
+
+def _col_letter(n):
+    letters = ''
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def _display(value):
+    """USER_ENTERED로 넣은 값이 시트에 보이는 문자열"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _trim(row):
+    row = list(row)
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+
+class FakeGoogle:
+    """가짜 스프레드시트(시트 하나) + 가짜 캘린더. 스레드 안전"""
+
+    def __init__(self, header, latency=0.0, quota_error_rate=0.0, seed_rows=0, seed=0):
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.calls = Counter()
+        self.lock = threading.RLock()
+        self._rng = random.Random(seed)
+        self.spreadsheet = FakeSpreadsheet(self)
+        self.worksheet = FakeWorksheet(self, self.spreadsheet, header)
+        self.spreadsheet.sheet1 = self.worksheet
+        self.calendar = FakeCalendar(self)
+        if seed_rows:
+            # 합성 예약은 벤치마크와 같은 생성기로 (날짜 표기·빈 행이 섞인 실제 시트 모양).
+            # benchmarks.synthetic 이 utils.sheets 를 import 하므로 여기서 import
+            from benchmarks.synthetic import synthetic_sheet
+            self.worksheet.load_records(synthetic_sheet(seed_rows, seed=seed, years=5).to_dict('records'))
+
+    def open_by_key(self, key):
+        self.call('spreadsheets.get')
+        return self.spreadsheet
+
+    def call(self, name):
+        """API 호출 한 번: 횟수 기록 → 지연 → 확률적으로 할당량 오류 (실제 요청처럼 utils/perf.py에도 기록)"""
+        with self.lock:
+            self.calls[name] += 1
+            fail = self.quota_error_rate and self._rng.random() < self.quota_error_rate
+        with api_call(name) as info:
+            if self.latency:
+                time.sleep(self.latency)
+            if fail:
+                info['quota'] = True
+                if name.startswith('events'):
+                    info['status'] = 403
+                    raise _calendar_error(403, 'rateLimitExceeded', 'Rate Limit Exceeded')
+                info['status'] = 429
+                raise _sheets_error(429, 'Quota exceeded for quota metric (fake)', 'RESOURCE_EXHAUSTED')
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls.clear()
+
+
+class FakeSpreadsheet:
+    def __init__(self, google):
+        self.google = google
+        # 내용이 프로세스마다 새로 만들어지므로 ID도 새로 → 이전 실행의 로컬 스냅샷과 섞이지 않음
+        self.id = f'fake-{uuid.uuid4().hex[:8]}'
+        self.title = '펜션 예약 (fake)'
+        self.modified = datetime.now(timezone.utc)
+        self.sheet1 = None
+
+    def touch(self):
+        self.modified = datetime.now(timezone.utc)
+
+    def get_lastUpdateTime(self):
+        self.google.call('drive.files.get')
+        return self.modified.isoformat()
+
+    def batch_update(self, body):
+        """updateCells / deleteDimension(ROWS) 요청만 처리"""
+        self.google.call('spreadsheets.batchUpdate')
+        sheet = self.sheet1
+        with self.google.lock:
+            for request in body.get('requests', []):
+                if 'updateCells' in request:
+                    update = request['updateCells']
+                    start = update['start']
+                    for r, row in enumerate(update.get('rows', [])):
+                        values = [next(iter(cell.get('userEnteredValue', {'stringValue': ''}).values()))
+                                  for cell in row.get('values', [])]
+                        sheet.set_values(start['rowIndex'] + r + 1, start['columnIndex'] + 1, values)
+                elif 'deleteDimension' in request:
+                    rng = request['deleteDimension']['range']
+                    if rng['dimension'] == 'ROWS':
+                        del sheet.rows[rng['startIndex']:rng['endIndex']]
+                else:
+                    raise _sheets_error(400, f'unsupported request: {list(request)}', 'INVALID_ARGUMENT')
+            self.touch()
+        return {'spreadsheetId': self.id, 'replies': [{} for _ in body.get('requests', [])]}
+
+
+class FakeWorksheet:
+    """rows[0] = 헤더, 값은 모두 화면에 보이는 문자열"""
+
+    def __init__(self, google, spreadsheet, header):
+        self.google = google
+        self.spreadsheet = spreadsheet
+        self.id = 0
+        self.title = '시트1'
+        self.rows = [list(header)]
+
+    # ── 테스트 준비용 (API 호출로 세지 않음) ──
+    def load_records(self, records):
+        header = self.rows[0]
+        with self.google.lock:
+            self.rows.extend([[record.get(col, '') for col in header] for record in records])
+            self.spreadsheet.touch()
+
+    def set_values(self, row, col, values):
+        """1-based row/col부터 values를 오른쪽으로 기록 (필요하면 행/열 확장)"""
+        while len(self.rows) < row:
+            self.rows.append([])
+        target = self.rows[row - 1]
+        end = col - 1 + len(values)
+        if len(target) < end:
+            target.extend([''] * (end - len(target)))
+        target[col - 1:end] = [_display(v) for v in values]
+
+    def _width(self):
+        return max((len(r) for r in self.rows), default=0)
+
+    def _range(self, a1):
+        """A1 범위 → (행 시작, 행 끝, 열 시작, 열 끝), 모두 1-based 포함"""
+        m = _A1.match(a1.strip())
+        if m is None:
+            raise _sheets_error(400, f'Unable to parse range: {a1}', 'INVALID_ARGUMENT')
+        c1, r1, c2, r2 = m.groups()
+        if m.group(3) is None and m.group(4) is None:
+            c2, r2 = c1, r1
+        last_row = max(len(self.rows), 1)
+        last_col = max(self._width(), 1)
+        return (int(r1) if r1 else 1, int(r2) if r2 else last_row,
+                _col_index(c1) if c1 else 1, _col_index(c2) if c2 else last_col)
+
+    def _values(self, a1):
+        r1, r2, c1, c2 = self._range(a1)
+        values = [_trim(row[c1 - 1:c2]) for row in self.rows[r1 - 1:r2]]
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    # ── gspread Worksheet 흉내 ──
+    def get_all_values(self, **kwargs):
+        self.google.call('values.get')
+        with self.google.lock:
+            width = self._width()
+            return [list(r) + [''] * (width - len(r)) for r in self.rows]
+
+    def get_all_records(self, **kwargs):
+        values = self.get_all_values()
+        if not values:
+            return []
+        header = values[0]
+        return [dict(zip(header, row)) for row in values[1:]]
+
+    def get(self, range_name=None, **kwargs):
+        self.google.call('values.get')
+        with self.google.lock:
+            return self._values(range_name or 'A1:' + _col_letter(max(self._width(), 1)))
+
+    def batch_get(self, ranges, **kwargs):
+        self.google.call('values.batchGet')
+        with self.google.lock:
+            return [self._values(a1) for a1 in ranges]
+
+    def row_values(self, row, **kwargs):
+        self.google.call('values.get')
+        with self.google.lock:
+            return _trim(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def col_values(self, col, **kwargs):
+        self.google.call('values.get')
+        with self.google.lock:
+            return _trim([(r[col - 1] if len(r) >= col else '') for r in self.rows])
+
+    def find(self, query, in_row=None, in_column=None, **kwargs):
+        # gspread도 내부적으로 시트 전체를 읽어 찾는다
+        self.google.call('values.get')
+        with self.google.lock:
+            for r, row in enumerate(self.rows, start=1):
+                if in_row is not None and r != in_row:
+                    continue
+                for c, value in enumerate(row, start=1):
+                    if (in_column is None or c == in_column) and value == str(query):
+                        return Cell(r, c, value)
+        return None
+
+    def append_rows(self, values, value_input_option='RAW', table_range=None, **kwargs):
+        self.google.call('values.append')
+        with self.google.lock:
+            # 표의 마지막 값 있는 행 다음에 붙임
+            last = len(self.rows)
+            while last > 0 and not any(self.rows[last - 1]):
+                last -= 1
+            start = last + 1
+            for offset, row in enumerate(values):
+                if start + offset <= len(self.rows):
+                    self.rows[start + offset - 1] = []
+                self.set_values(start + offset, 1, row)
+            end = start + len(values) - 1
+            width = max((len(r) for r in values), default=1)
+            self.spreadsheet.touch()
+        return {
+            'spreadsheetId': self.spreadsheet.id,
+            'updates': {
+                'updatedRange': f"'{self.title}'!A{start}:{_col_letter(width)}{end}",
+                'updatedRows': len(values),
+            },
+        }
+
+    def append_row(self, values, value_input_option='RAW', **kwargs):
+        return self.append_rows([values], value_input_option=value_input_option, **kwargs)
+
+    def update(self, values=None, range_name=None, **kwargs):
+        # gspread 5 순서(range_name, values)로 불러도 동작
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        self.google.call('values.update')
+        with self.google.lock:
+            r1, _, c1, _ = self._range(range_name or 'A1')
+            for offset, row in enumerate(values):
+                self.set_values(r1 + offset, c1, row)
+            self.spreadsheet.touch()
+        return {'updatedRange': range_name}
+
+    def delete_rows(self, start_index, end_index=None):
+        self.google.call('spreadsheets.batchUpdate')
+        with self.google.lock:
+            del self.rows[start_index - 1:(end_index or start_index)]
+            self.spreadsheet.touch()
+
+
+# ── 캘린더 ───────────────────────────────────────────────────
+class FakeRequest:
+    """googleapiclient HttpRequest 흉내: execute() 때 실행"""
+
+    def __init__(self, google, name, fn):
+        self.google = google
+        self.name = name
+        self.fn = fn
+
+    def execute(self, http=None, num_retries=0):
+        self.google.call(self.name)
+        return self.fn()
+
+
+class FakeBatch:
+    """new_batch_http_request 흉내: 요청 여러 개를 HTTP 한 번(지연 한 번)으로"""
+
+    def __init__(self, google, callback):
+        self.google = google
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request_id or str(len(self.requests)), request, callback or self.callback))
+
+    def execute(self, http=None):
+        from googleapiclient.errors import HttpError
+
+        self.google.call('batch')
+        for request_id, request, callback in self.requests:
+            try:
+                with self.google.lock:
+                    self.google.calls[request.name] += 1
+                    fail = self.google.quota_error_rate and self.google._rng.random() < self.google.quota_error_rate
+                if fail:
+                    raise _calendar_error(403, 'rateLimitExceeded', 'Rate Limit Exceeded')
+                response, exception = request.fn(), None
+            except HttpError as e:
+                response, exception = None, e
+            callback(request_id, response, exception)
+
+
+class FakeEvents:
+    def __init__(self, calendar):
+        self.calendar = calendar
+
+    def insert(self, calendarId=None, body=None, **kwargs):
+        return FakeRequest(self.calendar.google, 'events.insert', lambda: self.calendar.insert(body))
+
+    def patch(self, calendarId=None, eventId=None, body=None, **kwargs):
+        return FakeRequest(self.calendar.google, 'events.patch', lambda: self.calendar.patch(eventId, body))
+
+    def delete(self, calendarId=None, eventId=None, **kwargs):
+        return FakeRequest(self.calendar.google, 'events.delete', lambda: self.calendar.delete(eventId))
+
+    def get(self, calendarId=None, eventId=None, **kwargs):
+        return FakeRequest(self.calendar.google, 'events.get', lambda: self.calendar.get(eventId))
+
+    def list(self, calendarId=None, syncToken=None, pageToken=None, maxResults=250, showDeleted=False, **kwargs):
+        return FakeRequest(self.calendar.google, 'events.list',
+                           lambda: self.calendar.list(syncToken, pageToken, maxResults, showDeleted))
+
+
+class FakeCalendar:
+    """이벤트마다 마지막 변경 순번을 기록해 syncToken 이후 바뀐 것만 돌려준다"""
+
+    def __init__(self, google):
+        self.google = google
+        self.events_by_id = {}
+        self.seq = 0
+        self.oldest_token = 0   # 이보다 오래된 syncToken은 410 (expire_sync_tokens로 흉내)
+        # 동기화 상태(calendar_utils)도 이 캘린더와 함께 사라지도록 파일 대신 여기에 (JSON 문자열)
+        self.sync_state = None
+
+    def events(self):
+        return FakeEvents(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self.google, callback)
+
+    def _touch(self, event):
+        self.seq += 1
+        event['_seq'] = self.seq
+        event['updated'] = datetime.now(timezone.utc).isoformat()
+
+    def _public(self, event):
+        return {k: v for k, v in event.items() if k != '_seq'}
+
+    def _live(self, event_id):
+        event = self.events_by_id.get(event_id)
+        if event is None:
+            raise _calendar_error(404, 'notFound', 'Not Found')
+        if event['status'] == 'cancelled':
+            raise _calendar_error(410, 'deleted', 'Resource has been deleted')
+        return event
+
+    def insert(self, body):
+        with self.google.lock:
+            event = dict(body, id=uuid.uuid4().hex, status='confirmed')
+            self._touch(event)
+            self.events_by_id[event['id']] = event
+            return self._public(event)
+
+    def patch(self, event_id, body):
+        with self.google.lock:
+            event = self._live(event_id)
+            event.update(body)
+            self._touch(event)
+            return self._public(event)
+
+    def delete(self, event_id):
+        with self.google.lock:
+            event = self._live(event_id)
+            event['status'] = 'cancelled'
+            self._touch(event)
+            return ''
+
+    def get(self, event_id):
+        with self.google.lock:
+            event = self.events_by_id.get(event_id)
+            if event is None:
+                raise _calendar_error(404, 'notFound', 'Not Found')
+            return self._public(event)
+
+    def list(self, sync_token, page_token, max_results, show_deleted):
+        with self.google.lock:
+            since = 0
+            if sync_token is not None:
+                since = int(sync_token.split('-')[-1])
+                if since < self.oldest_token:
+                    raise _calendar_error(410, 'fullSyncRequired', 'Sync token is no longer valid')
+            items = sorted((e for e in self.events_by_id.values() if e['_seq'] > since), key=lambda e: e['_seq'])
+            if sync_token is None and not show_deleted:
+                items = [e for e in items if e['status'] != 'cancelled']
+            offset = int(page_token or 0)
+            page = items[offset:offset + max_results]
+            response = {'items': [self._public(e) for e in page]}
+            if offset + max_results < len(items):
+                response['nextPageToken'] = str(offset + max_results)
+            else:
+                response['nextSyncToken'] = f'sync-{self.seq}'
+            return response
+
+    def expire_sync_tokens(self):
+        """지금까지 발급한 syncToken을 모두 만료 (다음 증분 조회는 410)"""
+        with self.google.lock:
+            self.oldest_token = self.seq + 1
@@ -0,0 +1,168 @@
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from utils.sync import CACHE_DIR, row_versions
+from utils.write_queue import next_nos
+
+# 기본 위치 (로컬 캐시 폴더). secrets.toml [storage] sqlite_path 로 바꿀 수 있음
+DB_PATH = CACHE_DIR / 'reservations.db'
+
+# 집계용 뷰에서 숫자로 바꾸는 열 (시트 문자열 그대로 저장하므로)
+_INT_COLS = ['연도', '예약 월', '숙박 월', '숙박 일수', '인원수', '어른 인원수', '아이 인원수', '추가 인원수']
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def frame_checksum(frame):
+    """원본 문자열 프레임의 내용 해시 (행 순서 포함)"""
+    return hashlib.sha1(row_versions(frame).tobytes()).hexdigest() if len(frame) else ''
+
+
+class LocalStore:
+    """예약 시트와 같은 모양(No + COLUMNS, 모두 문자열)의 SQLite 테이블.
+
+    - 행 순서는 seq(추가 순서) = 시트 행 순서
+    - 수정/삭제는 예약ID로 찾는다
+    - reservations_clean 뷰: load_data와 같은 규칙(빈 행 제외, 숫자 변환)을 적용한 집계용 뷰
+    연결 하나를 여러 스레드(페이지 실행, 캘린더 워커)가 락으로 나눠 쓴다.
+    """
+
+    def __init__(self, path, columns):
+        self.columns = list(columns)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self._create()
+
+    def _create(self):
+        cols = ', '.join(f'{_q(c)} TEXT NOT NULL DEFAULT \'\'' for c in self.columns)
+        with self.lock, self.conn:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS reservations (seq INTEGER PRIMARY KEY AUTOINCREMENT, {cols})')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            # 나중에 COLUMNS에 열이 추가된 경우
+            existing = {row[1] for row in self.conn.execute('PRAGMA table_info(reservations)')}
+            for c in self.columns:
+                if c not in existing:
+                    self.conn.execute(f"ALTER TABLE reservations ADD COLUMN {_q(c)} TEXT NOT NULL DEFAULT ''")
+            if '예약ID' in self.columns:
+                self.conn.execute('CREATE INDEX IF NOT EXISTS idx_reservation_id ON reservations ("예약ID")')
+            self.conn.execute('DROP VIEW IF EXISTS reservations_clean')
+            self.conn.execute(f'CREATE VIEW reservations_clean AS SELECT {self._clean_select()} FROM reservations '
+                              'WHERE CAST("연도" AS REAL) > 0 AND TRIM("성함") <> \'\'')
+
+    def _clean_select(self):
+        parts = []
+        for c in self.columns:
+            if c in _INT_COLS:
+                parts.append(f'CAST(ROUND(CAST({_q(c)} AS REAL)) AS INTEGER) AS {_q(c)}')
+            elif c == '금액':
+                parts.append(f"CAST(ROUND(CAST(REPLACE(REPLACE({_q(c)}, ',', ''), '₩', '') AS REAL)) AS INTEGER) AS {_q(c)}")
+            else:
+                parts.append(_q(c))
+        return ', '.join(parts)
+
+    # ── 읽기 ──
+    def load_raw_frame(self):
+        """load_raw_frame(시트)와 같은 형식: 헤더 = No + COLUMNS, 모든 값 문자열"""
+        cols = ', '.join(_q(c) for c in self.columns)
+        with self.lock:
+            rows = self.conn.execute(f'SELECT {cols} FROM reservations ORDER BY seq').fetchall()
+        return pd.DataFrame(rows, columns=self.columns, dtype=str)
+
+    def read_row(self, reservation_id):
+        """예약ID 한 행 → 1행짜리 문자열 DataFrame (없으면 None)"""
+        cols = ', '.join(_q(c) for c in self.columns)
+        with self.lock:
+            row = self.conn.execute(f'SELECT {cols} FROM reservations WHERE "예약ID" = ?', (reservation_id,)).fetchone()
+        return None if row is None else pd.DataFrame([row], columns=self.columns, dtype=str)
+
+    def query(self, sql, params=()):
+        """SQL 결과 → DataFrame (집계는 reservations_clean 뷰 사용)"""
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    # ── 쓰기 ──
+    def replace_all(self, frame):
+        """시트에서 받은 원본 프레임으로 전체 교체. 내용이 같으면 건너뜀 (mirror 모드)"""
+        checksum = frame_checksum(frame)
+        with self.lock:
+            saved = self.conn.execute("SELECT value FROM meta WHERE key = 'checksum'").fetchone()
+            if saved is not None and saved[0] == checksum:
+                return False
+            values = frame.reindex(columns=self.columns, fill_value='').fillna('').astype(str).values.tolist()
+            placeholders = ', '.join('?' for _ in self.columns)
+            with self.conn:
+                self.conn.execute('DELETE FROM reservations')
+                self.conn.executemany(
+                    f'INSERT INTO reservations ({", ".join(_q(c) for c in self.columns)}) VALUES ({placeholders})',
+                    values,
+                )
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('checksum', ?)", (checksum,))
+        return True
+
+    def mark_stale(self):
+        """다음 replace_all은 내용 비교 없이 다시 쓰도록"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM meta WHERE key = 'checksum'")
+
+    def append_rows(self, rows, nos=None):
+        """rows: COLUMNS 순서 값 목록. nos: 시트에서 이미 정한 No (mirror).
+        없으면 시트와 같은 규칙(write_queue.next_nos)으로 매김. 새 No 목록 반환"""
+        data_cols = self.columns[1:]
+        placeholders = ', '.join('?' for _ in self.columns)
+        with self.lock, self.conn:
+            if nos is not None and len(nos) == len(rows):
+                new_nos = list(nos)
+            else:
+                current = [r[0] for r in self.conn.execute('SELECT "No" FROM reservations ORDER BY seq')]
+                new_nos = next_nos(current, len(rows))
+            self.conn.executemany(
+                f'INSERT INTO reservations ({", ".join(_q(c) for c in self.columns)}) VALUES ({placeholders})',
+                [[str(no)] + ['' if v is None else str(v) for v in (list(row) + [''] * len(data_cols))[:len(data_cols)]]
+                 for no, row in zip(new_nos, rows)],
+            )
+            self.conn.execute("DELETE FROM meta WHERE key = 'checksum'")
+        return new_nos
+
+    def update_row(self, reservation_id, row_data):
+        """시트의 update_row와 같이 두 번째 열(연도)부터 row_data 길이만큼 수정"""
+        cols = self.columns[1:1 + len(row_data)]
+        assignments = ', '.join(f'{_q(c)} = ?' for c in cols)
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                f'UPDATE reservations SET {assignments} WHERE "예약ID" = ?',
+                ['' if v is None else str(v) for v in row_data] + [reservation_id],
+            )
+            self.conn.execute("DELETE FROM meta WHERE key = 'checksum'")
+        return cursor.rowcount
+
+    def set_values(self, col_name, values_by_id):
+        """한 열을 예약ID별로 수정. values_by_id: {예약ID: 값}"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f'UPDATE reservations SET {_q(col_name)} = ? WHERE "예약ID" = ?',
+                [(str(value), reservation_id) for reservation_id, value in values_by_id.items()],
+            )
+            self.conn.execute("DELETE FROM meta WHERE key = 'checksum'")
+
+    def delete(self, reservation_id):
+        with self.lock, self.conn:
+            cursor = self.conn.execute('DELETE FROM reservations WHERE "예약ID" = ?', (reservation_id,))
+            self.conn.execute("DELETE FROM meta WHERE key = 'checksum'")
+        return cursor.rowcount
+
+    def assign_missing_ids(self, new_id):
+        """예약ID가 빈 (성함이 있는) 행에 new_id()로 ID 부여"""
+        with self.lock, self.conn:
+            seqs = [r[0] for r in self.conn.execute(
+                'SELECT seq FROM reservations WHERE TRIM("예약ID") = \'\' AND TRIM("성함") <> \'\'')]
+            self.conn.executemany('UPDATE reservations SET "예약ID" = ? WHERE seq = ?',
+                                  [(new_id(), seq) for seq in seqs])
+            self.conn.execute("DELETE FROM meta WHERE key = 'checksum'")
+        return len(seqs)
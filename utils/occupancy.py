@@ -0,0 +1,171 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 객실이 하나인 펜션 기준: 숙박 일자부터 숙박 일수만큼의 밤이 점유된다
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def booking_key(reservation_id, sheet_row):
+    """예약을 가리키는 키. 예약ID가 아직 없는 행은 시트 행 번호로 대신"""
+    reservation_id = str(reservation_id or '').strip()
+    return reservation_id if reservation_id else ('row', int(sheet_row))
+
+
+def _ordinal(value):
+    return pd.Timestamp(value).date().toordinal()
+
+
+class OccupancyIndex:
+    """점유된 밤 구간 [체크인, 체크아웃) 을 체크인 순으로 정렬해 둔 인덱스.
+
+    - 겹침 조회: 체크인이 (시작 - 최장 숙박, 끝) 사이인 구간만 이분 탐색으로 골라 확인
+    - 추가/수정/삭제: 정렬 위치에 바로 끼우고 빼므로 다시 만들 필요 없음
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._entries = []      # (체크인 ordinal, seq) 정렬 목록
+        self._meta = {}         # seq → (키, 체크아웃 ordinal, 표시 이름)
+        self._seq_by_key = {}   # 키 → (체크인 ordinal, seq)
+        self._next_seq = 0
+        self._max_nights = 1    # 삭제해도 줄이지 않음 (탐색 범위가 조금 넓어질 뿐)
+        self._row_keyed = 0     # 예약ID 없이 시트 행 번호로 구분하는 예약 수
+        self.token = None       # 반영된 load_data 결과 (data_version)
+        self.counter = None     # 반영된 데이터 버전 카운터
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, df):
+        """load_data 결과로 처음부터 다시 만든다"""
+        if df.empty:
+            with self.lock:
+                self._entries, self._meta, self._seq_by_key = [], {}, {}
+                self._next_seq, self._max_nights, self._row_keyed = 0, 1, 0
+                self.token = df.attrs.get('data_version')
+                self.counter = df.attrs.get('data_counter')
+            return
+        stay = df['숙박 일자']
+        nights = df['숙박 일수'].astype('int64').clip(lower=1)
+        valid = stay.notna().to_numpy()
+        starts = stay.to_numpy()[valid].astype('datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL
+        ends = starts + nights.to_numpy()[valid]
+        keys = [booking_key(rid, row) for rid, row in zip(df['예약ID'].to_numpy()[valid], df['_sheet_row'].to_numpy()[valid])]
+        labels = df['성함'].astype(str).to_numpy()[valid]
+
+        order = np.argsort(starts, kind='stable')
+        with self.lock:
+            self._entries = [(int(starts[i]), seq) for seq, i in enumerate(order)]
+            self._meta = {seq: (keys[i], int(ends[i]), labels[i]) for seq, i in enumerate(order)}
+            self._seq_by_key = {keys[i]: (int(starts[i]), seq) for seq, i in enumerate(order)}
+            self._next_seq = len(order)
+            self._max_nights = int(nights.max())
+            self._row_keyed = sum(isinstance(k, tuple) for k in keys)
+            self.token = df.attrs.get('data_version')
+            self.counter = df.attrs.get('data_counter')
+
+    def add(self, key, stay_date, nights, label=''):
+        """예약 추가 (같은 키가 있으면 교체)"""
+        start = _ordinal(stay_date)
+        nights = max(1, int(nights))
+        with self.lock:
+            self.remove(key)
+            seq = self._next_seq
+            self._next_seq += 1
+            insort(self._entries, (start, seq))
+            self._meta[seq] = (key, start + nights, label)
+            self._seq_by_key[key] = (start, seq)
+            self._max_nights = max(self._max_nights, nights)
+            self._row_keyed += isinstance(key, tuple)
+
+    def remove(self, key):
+        with self.lock:
+            found = self._seq_by_key.pop(key, None)
+            if found is None:
+                return False
+            i = bisect_left(self._entries, found)
+            del self._entries[i]
+            del self._meta[found[1]]
+            self._row_keyed -= isinstance(key, tuple)
+            return True
+
+    def delete_row(self, key):
+        """시트 행 삭제 반영. 아래 행 번호가 밀리므로 행 번호 키가 남아 있으면 다시 만들도록 표시"""
+        with self.lock:
+            self.remove(key)
+            if self._row_keyed:
+                self.counter = None
+
+    def _window(self, start, end):
+        """[start, end) 와 겹칠 수 있는 구간들 (체크인 순)"""
+        lo = bisect_left(self._entries, (start - self._max_nights + 1, -1))
+        hi = bisect_left(self._entries, (end, -1))
+        for check_in, seq in self._entries[lo:hi]:
+            key, check_out, label = self._meta[seq]
+            if check_out > start:
+                yield key, check_in, check_out, label
+
+    def overlaps(self, stay_date, nights, exclude=None):
+        """stay_date부터 nights박과 겹치는 예약 목록 [{키, 체크인, 체크아웃, 성함}]"""
+        start = _ordinal(stay_date)
+        end = start + max(1, int(nights))
+        with self.lock:
+            return [
+                {'키': key, '체크인': date.fromordinal(ci), '체크아웃': date.fromordinal(co), '성함': label}
+                for key, ci, co, label in self._window(start, end)
+                if key != exclude
+            ]
+
+    def free_dates(self, start_date, days):
+        """start_date부터 days일 중 비어 있는 밤(날짜) 목록"""
+        start = _ordinal(start_date)
+        end = start + days
+        occupied = np.zeros(days, dtype=bool)
+        with self.lock:
+            for _, ci, co, _ in self._window(start, end):
+                occupied[max(ci, start) - start:min(co, end) - start] = True
+        return [date.fromordinal(start) + timedelta(days=int(i)) for i in np.flatnonzero(~occupied)]
+
+    def advance(self, counter):
+        """방금 한 쓰기를 add/remove로 반영했을 때 호출. 바로 이전 버전이었을 때만 새 버전으로 인정
+        (이미 그 버전으로 만들어져 있으면 그대로)"""
+        with self.lock:
+            if self.counter is not None and counter == self.counter:
+                return
+            if self.counter is not None and counter == self.counter + 1:
+                self.counter = counter
+                self.token = None
+            else:
+                # 사이에 다른 쓰기가 끼어들었으면 다음 조회 때 새로 만든다
+                self.counter = None
+
+
+@st.cache_resource
+def _occupancy_index():
+    return OccupancyIndex()
+
+
+def advance_occupancy_index(counter):
+    """점유와 관계없는 쓰기(캘린더ID 기록) 뒤 호출 → 그 쓰기 때문에 인덱스를 다시 만들지 않음"""
+    _occupancy_index().advance(counter)
+
+
+def get_occupancy_index(df):
+    """load_data 결과에 맞는 점유 인덱스 (프로세스당 하나).
+    이 앱에서 한 쓰기는 add/remove로 이미 반영돼 있으므로 다시 만들지 않는다"""
+    index = _occupancy_index()
+    token = df.attrs.get('data_version')
+    counter = df.attrs.get('data_counter')
+    with index.lock:
+        if token is not None and index.token == token:
+            return index
+        if index.token is None and counter is not None and index.counter == counter:
+            index.token = token
+            return index
+        index.rebuild(df)
+    return index
@@ -0,0 +1,227 @@
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils.sync import CACHE_DIR
+
+# ── 설정 ────────────────────────────────────────────────────
+# secrets.toml
+#   [perf]
+#   panel = true                 # 사이드바에 실행 시간 패널 (주소 끝에 ?perf=1 을 붙여도 켜짐)
+#   log = true                   # 구간/실행 기록을 JSON 한 줄씩 .cache/perf.jsonl 에
+#                                # (파일 경로를 적으면 그 파일, "stderr"면 표준 오류로)
+ROOT = Path(__file__).resolve().parent.parent
+BACKGROUND = '(background)'   # 페이지 실행 밖(캘린더 워커 등)에서 일어난 호출
+MAX_SPANS = 500               # 한 번 실행에 보관할 최대 구간 수
+MAX_SESSIONS = 200
+
+_log = logging.getLogger('pension.perf')
+_local = threading.local()    # 스레드별 현재 구간 깊이
+
+
+def _config():
+    try:
+        return dict(st.secrets.get('perf', {}))
+    except FileNotFoundError:
+        return {}
+
+
+@st.cache_resource
+def _log_sink():
+    """[perf] log 설정대로 핸들러를 한 번만 붙인다"""
+    target = _config().get('log')
+    if not target:
+        return None
+    if target == 'stderr':
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        path = CACHE_DIR / 'perf.jsonl' if target is True else ROOT / str(target)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.FileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    _log.addHandler(handler)
+    _log.setLevel(logging.INFO)
+    _log.propagate = False
+    return handler
+
+
+def _emit(event, **fields):
+    if _log.isEnabledFor(logging.INFO):
+        _log.info(json.dumps({'ts': round(time.time(), 3), 'event': event, **fields},
+                             ensure_ascii=False, default=str))
+
+
+# ── 세션별 기록 ─────────────────────────────────────────────
+class SessionStats:
+    """한 브라우저 세션의 이번 실행 구간 목록과 API 카운터 (이번 실행 / 세션 누적)"""
+
+    def __init__(self, session):
+        self.session = session
+        self.lock = threading.Lock()
+        self.page = None
+        self.started = None
+        self.runs = 0
+        self.spans = []               # 이번 실행: [이름, 초, 깊이, 종류] (시작 순서)
+        self.run = Counter()          # 이번 실행: api_calls / bytes / quota_errors
+        self.run_by_api = Counter()   # 이번 실행: API 메서드별 호출 수
+        self.total = Counter()        # 세션 누적
+
+    def start(self, page):
+        with self.lock:
+            self.page = page
+            self.started = time.perf_counter()
+            self.runs += 1
+            self.spans = []
+            self.run = Counter()
+            self.run_by_api = Counter()
+
+    def open_span(self, name, depth, kind):
+        """시작 순서대로 자리를 잡아둔다 (안쪽 구간이 바깥 구간 아래에 보이도록). 자리 번호 반환"""
+        with self.lock:
+            if len(self.spans) >= MAX_SPANS:
+                return None
+            self.spans.append([name, None, depth, kind])
+            return len(self.spans) - 1
+
+    def close_span(self, slot, seconds):
+        if slot is not None:
+            with self.lock:
+                # 그 사이 새 실행이 시작됐으면 (begin_run) 목록이 바뀌었으므로 버림
+                if slot < len(self.spans) and self.spans[slot][1] is None:
+                    self.spans[slot][1] = seconds
+
+    def count_api(self, name, info):
+        counts = Counter(api_calls=1, bytes=info.get('bytes') or 0, quota_errors=int(bool(info.get('quota'))))
+        with self.lock:
+            self.run.update(counts)
+            self.total.update(counts)
+            self.run_by_api[name] += 1
+
+
+@st.cache_resource
+def _registry():
+    return {'lock': threading.Lock(), 'sessions': {}}
+
+
+def _session_stats():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    key = ctx.session_id if ctx is not None else BACKGROUND
+    registry = _registry()
+    with registry['lock']:
+        stats = registry['sessions'].get(key)
+        if stats is None:
+            sessions = registry['sessions']
+            # 닫힌 세션은 따로 알 수 없으므로 오래된 것부터 버린다
+            while len(sessions) >= MAX_SESSIONS:
+                del sessions[next(iter(sessions))]
+            stats = sessions[key] = SessionStats(key)
+        return stats
+
+
+# ── 측정 ─────────────────────────────────────────────────────
+@contextmanager
+def span(name, kind='section'):
+    """구간 시간 측정. yield한 dict에 넣은 값은 로그 기록에 함께 남는다"""
+    stats = _session_stats()
+    depth = getattr(_local, 'depth', 0)
+    _local.depth = depth + 1
+    slot = stats.open_span(name, depth, kind)
+    fields = {}
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        seconds = time.perf_counter() - start
+        _local.depth = depth
+        stats.close_span(slot, seconds)
+        _emit('span', name=name, kind=kind, ms=round(seconds * 1000, 2),
+              session=stats.session, page=stats.page, **fields)
+
+
+@contextmanager
+def api_call(name):
+    """구글 API 요청 하나. yield한 dict에 bytes(응답 크기), status, quota(할당량 오류 여부)를 채운다"""
+    stats = _session_stats()
+    with span(name, kind='api') as info:
+        info['bytes'] = 0
+        try:
+            yield info
+        finally:
+            stats.count_api(name, info)
+
+
+def begin_run(page):
+    """페이지 스크립트 맨 위에서 호출 → 이번 실행 기록 시작"""
+    _log_sink()
+    _local.depth = 0
+    _session_stats().start(page)
+
+
+def _fragment_rerun():
+    """fragment만 다시 실행되는 중인지 (전체 실행 중에 부른 fragment는 아님)"""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+def fragment_run(name):
+    """@st.fragment 함수에 붙임 (@st.fragment 바로 아래).
+    fragment만 다시 실행될 때는 begin_run/end_run이 불리지 않으므로 여기서 name으로 실행 기록을 따로 연다.
+    전체 실행 중에는 그냥 그 실행의 구간으로 남는다"""
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            if not _fragment_rerun():
+                return func(*args, **kwargs)
+            begin_run(name)
+            result = func(*args, **kwargs)
+            end_run()
+            return result
+        return run
+    return decorate
+
+
+def end_run():
+    """페이지 스크립트 맨 끝에서 호출 → 실행 기록을 남기고, 켜져 있으면 사이드바 패널 표시
+    (fragment만 다시 실행된 경우에는 사이드바에 쓸 수 없으므로 fragment 안에 표시)"""
+    stats = _session_stats()
+    if stats.started is None:
+        return
+    total = time.perf_counter() - stats.started
+    _emit('run', page=stats.page, session=stats.session, ms=round(total * 1000, 2), **stats.run)
+
+    if not (_config().get('panel') or st.query_params.get('perf') == '1'):
+        return
+    with stats.lock:
+        spans = [tuple(s) for s in stats.spans if s[1] is not None]
+        run, by_api, session_total = Counter(stats.run), Counter(stats.run_by_api), Counter(stats.total)
+
+    container = st if _fragment_rerun() else st.sidebar
+    with container.expander(f"⏱ 실행 시간 {total * 1000:,.0f}ms · {stats.page}", expanded=True):
+        st.caption(
+            f"이번 실행: API {run['api_calls']}회 · {run['bytes'] / 1024:,.0f}KB · 할당량 오류 {run['quota_errors']}회  \n"
+            f"세션 누적 ({stats.runs}번 실행): API {session_total['api_calls']}회 · "
+            f"{session_total['bytes'] / 1024:,.0f}KB · 할당량 오류 {session_total['quota_errors']}회"
+        )
+        if spans:
+            st.dataframe(
+                pd.DataFrame({
+                    '구간': ['  ' * depth + name for name, _, depth, _ in spans],
+                    'ms': [round(seconds * 1000, 1) for _, seconds, _, _ in spans],
+                }),
+                hide_index=True, use_container_width=True,
+            )
+        if by_api:
+            st.dataframe(
+                pd.DataFrame(sorted(by_api.items()), columns=['API', '호출']),
+                hide_index=True, use_container_width=True,
+            )
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 한글 음절의 초성 (유니코드 순서)
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_CHOSEONG_SET = set(CHOSEONG)
+
+PAGE_SIZE = 50
+
+
+def to_choseong(text):
+    """'홍길동' → 'ㅎㄱㄷ' (한글 음절이 아닌 글자는 그대로)"""
+    return ''.join(
+        CHOSEONG[(ord(ch) - 0xAC00) // 588] if '가' <= ch <= '힣' else ch
+        for ch in text
+    )
+
+
+def _is_choseong_query(query):
+    # 초성이 하나라도 있고 완성된 음절은 없을 때 (예: 'ㅎㄱㄷ', 'ㅎㄱㄷ2')
+    return (any(ch in _CHOSEONG_SET for ch in query)
+            and not any('가' <= ch <= '힣' for ch in query))
+
+
+def build_search_index(df):
+    """(연도, 숙박 월) → 행 위치, 그리고 이름/초성/전화번호 검색용 정규화 문자열"""
+    # 검색어처럼 공백을 빼고 비교
+    names = df['성함'].astype(str).str.replace(' ', '', regex=False)
+    # 같은 이름은 한 번만 초성 변환
+    codes, uniques = pd.factorize(names)
+    choseong = np.array([to_choseong(u) for u in uniques], dtype=object)
+    phones = df['전화번호'].astype(str) if '전화번호' in df.columns else pd.Series('', index=df.index)
+    keys = df['예약ID']
+
+    return {
+        'size': len(df),
+        'by_year_month': df.groupby(['연도', '숙박 월']).indices,
+        'by_year': df.groupby('연도').indices,
+        'by_month': df.groupby('숙박 월').indices,
+        'name': names.str.lower().reset_index(drop=True),
+        'choseong': pd.Series(choseong[codes] if len(codes) else [], dtype=object),
+        'phone': phones.str.replace(r'\D', '', regex=True).reset_index(drop=True),
+        # 수정/삭제 선택용: 예약ID → 위치 / 표시 이름
+        'position_by_key': dict(zip(keys.tolist(), range(len(df)))),
+        'label_by_key': dict(zip(keys.tolist(), picker_labels(df).tolist())),
+    }
+
+
+def picker_labels(df):
+    """'2025년 3월 2025-03-01 - 홍길동 (150,000원)' 형식 라벨을 열 단위로 한 번에 생성"""
+    stay = df['숙박 일자'].dt.strftime('%Y-%m-%d').fillna('')
+    amount = df['금액'].map('{:,}'.format)
+    return (df['연도'].astype(str) + '년 ' + df['숙박 월'].astype(str) + '월 ' + stay
+            + ' - ' + df['성함'].astype(str) + ' (' + amount + '원)')
+
+
+def get_search_index(df):
+    """load_data 결과에 대한 검색 인덱스. 데이터 버전마다 한 번만 생성"""
+    version = df.attrs.get('data_version')
+    if version is None:
+        return build_search_index(df)
+    return _cached_search_index(df, version)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _cached_search_index(_df, data_version):
+    return build_search_index(_df)
+
+
+def filter_positions(index, year=None, month=None):
+    """연도/숙박 월 조건에 맞는 행 위치 (None이면 조건 없음)"""
+    empty = np.array([], dtype=np.int64)
+    if year is not None and month is not None:
+        return index['by_year_month'].get((year, month), empty)
+    if year is not None:
+        return index['by_year'].get(year, empty)
+    if month is not None:
+        return index['by_month'].get(month, empty)
+    return np.arange(index['size'])
+
+
+def search_positions(index, query, positions):
+    """positions 중 검색어에 맞는 행만 남김.
+    초성으로 입력하면 초성 검색, 숫자(-)만 입력하면 전화번호 검색, 그 외에는 이름 부분 검색"""
+    query = (query or '').strip().replace(' ', '')
+    if not query or len(positions) == 0:
+        return positions
+    if _is_choseong_query(query):
+        target, needle = index['choseong'], query
+    elif query.replace('-', '').isdigit():
+        target, needle = index['phone'], query.replace('-', '')
+    else:
+        target, needle = index['name'], query.lower()
+    hits = target.iloc[positions].str.contains(needle, regex=False, na=False).to_numpy()
+    return positions[hits]
+
+
+def page_slice(positions, page, page_size=PAGE_SIZE):
+    """1부터 시작하는 page 번호의 행 위치"""
+    start = (page - 1) * page_size
+    return positions[start:start + page_size]
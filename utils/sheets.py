@@ -1,19 +1,77 @@
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import google.auth.exceptions
 import gspread
+import numpy as np
 from google.oauth2.service_account import Credentials
 import pandas as pd
 import streamlit as st
 
+from utils.dates import parse_dates
+from utils.fake_google import FakeGoogle, fake_google_config
+from utils.local_db import DB_PATH, LocalStore
+from utils.occupancy import advance_occupancy_index
+from utils.perf import api_call, span
+from utils.sync import load_raw_frame, read_row, row_versions, invalidate_snapshot, mark_dirty
+from utils.write_queue import WriteBatch
+
 COLUMNS = [
     '연도', '성함', '전화번호', '예약 월', '예약 일자',
     '숙박 월', '숙박 일자', '숙박 일수', '퇴실 일자',
     '인원수', '어른 인원수', '아이 인원수', '추가 인원수',
     '바비큐 1', '불멍', '바비큐+불멍', '수영장 사용', '리뷰이벤트',
-    '금액', '비고', '캘린더ID'
+    '금액', '비고', '캘린더ID', '예약ID'
 ]
+# 행 내용 해시(_row_version)에 넣는 열. 표 오른쪽에 따로 적힌 칸은 빼고 비교한다
+VERSION_COLUMNS = ['No'] + COLUMNS
 
 SERVICE_COLS = ['바비큐 1', '불멍', '바비큐+불멍', '수영장 사용', '리뷰이벤트']
 SERVICE_NAMES = ['바비큐', '불멍', '바비큐+불멍', '수영장', '리뷰이벤트']
 
+DATE_COLS = ['예약 일자', '숙박 일자', '퇴실 일자']
+MONTH_COLS = ['예약 월', '숙박 월']
+COUNT_COLS = ['숙박 일수', '인원수', '어른 인원수', '아이 인원수', '추가 인원수']
+CHECKED_VALUES = {'O', 'Y', 'YES', '예', 'TRUE', '1', '✓', 'V'}
+
+# 읽기 캐시 유지 시간(초). 쓰기가 일어나면 TTL과 관계없이 즉시 무효화된다.
+CACHE_TTL = 300
+
+
+def _api_name(method, url):
+    """요청 URL → 'values.get', 'spreadsheets.batchUpdate', 'drive.files.get' 같은 API 메서드 이름"""
+    path = url.split('?', 1)[0]
+    if 'googleapis.com/drive/' in path:
+        return 'drive.files.get' if method.upper() == 'GET' else f'drive.files.{method.lower()}'
+    if '/values' in path:
+        # 'values/A1:append', 'values:batchGet' (범위 안의 ':'는 인코딩돼 있거나 대문자 열 이름)
+        action = path.rsplit(':', 1)[-1] if ':' in path.rsplit('/', 1)[-1] else ''
+        if action.isalpha() and action[0].islower():
+            return 'values.' + action
+        return {'GET': 'values.get', 'PUT': 'values.update'}.get(method.upper(), 'values.' + method.lower())
+    if path.endswith(':batchUpdate'):
+        return 'spreadsheets.batchUpdate'
+    return 'spreadsheets.' + ('get' if method.upper() == 'GET' else method.lower())
+
+
+class _TimedHTTPClient(gspread.http_client.HTTPClient):
+    """모든 시트/드라이브 요청의 시간, 응답 크기, 할당량 오류를 utils/perf.py에 기록"""
+
+    def request(self, method, endpoint, *args, **kwargs):
+        with api_call(_api_name(method, endpoint)) as info:
+            try:
+                response = super().request(method, endpoint, *args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                info['status'] = e.code
+                info['quota'] = e.code == 429
+                raise
+            info['status'] = response.status_code
+            info['bytes'] = len(response.content)
+            return response
+
 
 @st.cache_resource
 def get_client():
@@ -25,40 +83,205 @@ def get_client():
         st.secrets["gcp_service_account"],
         scopes=scopes
     )
-    return gspread.Client(auth=creds)
+    return gspread.Client(auth=creds, http_client=_TimedHTTPClient)
+
+
+@st.cache_resource
+def get_fake_google():
+    """[fake_google] 설정(또는 FAKE_GOOGLE 환경 변수)이 있으면 시트/캘린더 대신 쓸 가짜 서버"""
+    try:
+        config = fake_google_config(st.secrets)
+    except FileNotFoundError:
+        config = fake_google_config()
+    return FakeGoogle(['No'] + COLUMNS, **config) if config else None
+
+
+@st.cache_resource
+def _open_sheet():
+    fake = get_fake_google()
+    if fake is not None:
+        return fake.open_by_key(fake.spreadsheet.id).sheet1
+    # open_by_url은 매번 URL 파싱 + 메타데이터 조회 → 키로 한 번만 열고 핸들을 재사용
+    key = gspread.utils.extract_id_from_url(st.secrets["sheet_url"])
+    return get_client().open_by_key(key).sheet1
 
 
 def get_sheet():
-    client = get_client()
-    return client.open_by_url(st.secrets["sheet_url"]).sheet1
+    return _open_sheet()
+
+
+# 핸들을 다시 열어야 하는 오류: 인증 만료(401/403), 시트가 옮겨지거나 삭제됨(404)
+_REOPEN_CODES = {401, 403, 404}
+
+
+def _is_stale_handle_error(e):
+    if isinstance(e, (gspread.exceptions.SpreadsheetNotFound, gspread.exceptions.WorksheetNotFound)):
+        return True
+    return isinstance(e, gspread.exceptions.APIError) and e.code in _REOPEN_CODES
+
+
+def _with_sheet(op):
+    """op(sheet) 실행. 캐시된 핸들이 무효하면 한 번만 다시 열어서 재시도"""
+    try:
+        return op(get_sheet())
+    except gspread.exceptions.GSpreadException as e:
+        if not _is_stale_handle_error(e):
+            raise
+        _open_sheet.clear()
+        get_client.clear()
+        return op(get_sheet())
+
+
+def _flush(batch):
+    # flush는 중간에 실패해도 이어서 할 수 있으므로 (write_queue) 다시 열어 재시도해도 행이 두 번 붙지 않음
+    def op(sheet):
+        batch.sheet = sheet
+        return batch.flush()
+    return _with_sheet(op)
+
+
+# ── 데이터 버전 (프로세스 전역) ─────────────────────────────
+@st.cache_resource
+def _data_state():
+    return {'version': 0, 'lock': threading.Lock()}
+
+
+def get_data_version():
+    return _data_state()['version']
+
+
+def bump_data_version():
+    """시트에 쓰기가 일어났거나 새로고침을 눌렀을 때 호출 → 읽기 캐시 무효화"""
+    state = _data_state()
+    with state['lock']:
+        state['version'] += 1
+        return state['version']
+
+
+def refresh_data():
+    bump_data_version()
+
+
+# ── 저장소 선택 ─────────────────────────────────────────────
+# secrets.toml
+#   [storage]
+#   backend = "sheets"   # 기본: 구글 시트만
+#             "sqlite"   # 로컬 SQLite만 (구글 계정 없이 오프라인으로 사용)
+#             "mirror"   # 시트가 기준, 읽을 때마다 로컬 사본 갱신 + 쓰기는 양쪽에.
+#                        # 집계는 로컬 SQL로, 시트에 연결할 수 없으면 로컬 사본으로 읽기
+#   sqlite_path = ".cache/reservations.db"
+STORAGE_BACKENDS = ('sheets', 'sqlite', 'mirror')
+
+# 오프라인/인증 실패로 보고 mirror 모드에서 로컬 사본으로 읽을 오류
+_OFFLINE_ERRORS = (gspread.exceptions.GSpreadException, google.auth.exceptions.GoogleAuthError, OSError)
+
+
+def _storage_config():
+    try:
+        return dict(st.secrets.get('storage', {}))
+    except FileNotFoundError:
+        return {}
+
+
+def storage_backend():
+    backend = _storage_config().get('backend', 'sheets')
+    return backend if backend in STORAGE_BACKENDS else 'sheets'
+
+
+def _uses_sheets():
+    return storage_backend() != 'sqlite'
+
+
+@st.cache_resource
+def get_local_store():
+    return LocalStore(_storage_config().get('sqlite_path', DB_PATH), ['No'] + COLUMNS)
+
+
+def local_store():
+    """로컬 DB를 쓰는 설정(sqlite/mirror)이면 LocalStore, 아니면 None"""
+    return get_local_store() if storage_backend() != 'sheets' else None
+
+
+def _load_raw():
+    """(원본 문자열 프레임, 로컬 DB가 이 프레임과 같은 내용인지)"""
+    backend = storage_backend()
+    if backend == 'sheets':
+        # 로컬 스냅샷 기준으로 바뀐 행만 받아옴 (utils/sync.py)
+        return _with_sheet(load_raw_frame), False
+    store = get_local_store()
+    if backend == 'sqlite':
+        return store.load_raw_frame(), True
+    try:
+        frame = _with_sheet(load_raw_frame)
+    except _OFFLINE_ERRORS:
+        # 시트에 연결할 수 없으면 마지막으로 받아둔 로컬 사본으로
+        return store.load_raw_frame(), True
+    try:
+        store.replace_all(frame)
+    except sqlite3.Error:
+        return frame, False
+    return frame, True
+
+
+def _write_local(op):
+    """sqlite/mirror 설정이면 로컬 DB에도 같은 변경 적용.
+    mirror에서는 로컬 실패가 시트 쓰기를 되돌리지 않음 (다음 로드 때 시트 기준으로 다시 맞춤)"""
+    backend = storage_backend()
+    if backend == 'sheets':
+        return
+    store = get_local_store()
+    if backend == 'sqlite':
+        op(store)
+        bump_data_version()
+        return
+    try:
+        op(store)
+    except sqlite3.Error:
+        store.mark_stale()
 
 
 def load_data():
-    sheet = get_sheet()
-    records = sheet.get_all_records()
-    if not records:
+    return _load_data_cached(get_data_version())
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=4, show_spinner=False)
+def _load_data_cached(version):
+    with span('load.raw') as info:
+        raw, in_local_db = _load_raw()
+        info['rows'] = len(raw)
+    with span('load.clean'):
+        df = _clean(raw)
+    # 이 로드 결과를 식별하는 토큰 → 파생 집계 캐시의 키로 사용 (TTL 만료 후 재로드도 구분)
+    df.attrs['data_version'] = f"{version}:{time.time_ns()}"
+    df.attrs['data_counter'] = version
+    # 로컬 DB가 같은 데이터를 갖고 있으면 집계를 SQL로 (utils/analytics.py)
+    df.attrs['local_db'] = in_local_db
+    return df
+
+
+def _clean(df):
+    if df.empty:
         return pd.DataFrame(columns=COLUMNS)
-    df = pd.DataFrame(records)
 
+    # 불러온 시점의 행 내용 해시 → 수정/삭제 직전에 그 행만 다시 읽어 비교
+    df['_row_version'] = row_versions(df, VERSION_COLUMNS)
     # 실제 시트 행 번호 기록 (헤더=1행, 데이터 시작=2행)
     df['_sheet_row'] = range(2, len(df) + 2)
+    # 예약ID 열이 아직 없는 시트
+    if '예약ID' not in df.columns:
+        df['예약ID'] = ''
+    df['예약ID'] = df['예약ID'].astype(str).str.strip()
 
     if '금액' in df.columns:
         df['금액'] = pd.to_numeric(
             df['금액'].astype(str).str.replace(',', '').str.replace('₩', ''),
             errors='coerce'
         ).fillna(0)
-    numeric_cols = ['연도', '숙박 일수', '인원수', '어른 인원수', '아이 인원수', '추가 인원수',
-                    '예약 월', '숙박 월']
+    numeric_cols = ['연도'] + MONTH_COLS + COUNT_COLS
     for col in numeric_cols:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
 
-    int_cols = ['연도', '예약 월', '숙박 월']
-    for col in int_cols:
-        if col in df.columns:
-            df[col] = df[col].astype(int)
-
     # 빈 행 제거 (연도가 0이거나 성함이 비어있는 행)
     if '연도' in df.columns:
         df = df[df['연도'] > 0]
@@ -66,30 +289,268 @@ def load_data():
         df = df[df['성함'].astype(str).str.strip() != '']
 
     df = df.reset_index(drop=True)
+    return _apply_schema(df)
+
+
+def _apply_schema(df):
+    """페이지에서 바로 쓸 수 있도록 타입 고정: 날짜 → datetime64, 서비스 → bool,
+    인원/일수/월 → 작은 정수, 성함 → category"""
+    if 'No' in df.columns:
+        df['No'] = pd.to_numeric(df['No'], errors='coerce').fillna(0).astype('int32')
+    for col, dtype in [('연도', 'int16'), ('금액', 'int64'), ('_sheet_row', 'int32')]:
+        if col in df.columns:
+            df[col] = df[col].round().astype(dtype)
+    for col in MONTH_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype('int8')
+    for col in COUNT_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype('int16')
+    for col in DATE_COLS:
+        if col in df.columns:
+            df[col] = parse_dates(df[col])
+    for col in SERVICE_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().str.upper().isin(CHECKED_VALUES)
+    if '성함' in df.columns:
+        df['성함'] = df['성함'].astype(str).str.strip().astype('category')
     return df
 
 
 def is_checked(value):
-    return str(value).strip().upper() in ['O', 'Y', 'YES', '예', 'TRUE', '1', '✓', 'V']
+    return str(value).strip().upper() in CHECKED_VALUES
+
+
+# ── 추가 서비스 통계 ─────────────────────────────────────────
+def service_matrix(df):
+    """서비스 이용 여부 bool 행렬 (열 이름 = SERVICE_NAMES). load_data에서 이미 bool로 변환됨"""
+    cols = [c for c in SERVICE_COLS if c in df.columns]
+    return df[cols].rename(columns=dict(zip(SERVICE_COLS, SERVICE_NAMES)))
+
+
+def service_usage(df, by=None):
+    """서비스별 이용 횟수 / 이용률(%)을 groupby 한 번으로 계산.
+    by(예: '숙박 월')를 주면 그룹별로, 없으면 전체 기준. 결과는 긴 형식 DataFrame"""
+    matrix = service_matrix(df)
+    keys = df[by] if by else pd.Series(0, index=df.index, name='_all')
+    grouped = matrix.groupby(keys, observed=True)
+    counts = grouped.sum()
+    totals = grouped.size()
+    rates = (counts.div(totals, axis=0) * 100).round(1)
+
+    usage = pd.concat(
+        {'이용횟수': counts.stack(), '이용률(%)': rates.stack()}, axis=1
+    ).reset_index()
+    usage.columns = [by or '_all', '서비스', '이용횟수', '이용률(%)']
+    usage['이용횟수'] = usage['이용횟수'].astype(int)
+    return usage.drop(columns='_all') if by is None else usage
+
+
+def service_combinations(df):
+    """함께 이용한 서비스 조합별 건수 (아무것도 이용 안 한 예약은 제외)"""
+    matrix = service_matrix(df)
+    names = list(matrix.columns)
+    codes = pd.Series(matrix.to_numpy(dtype='int64') @ (1 << np.arange(len(names))), index=df.index)
+    counts = codes[codes > 0].value_counts()
+    labels = [' + '.join(n for i, n in enumerate(names) if code >> i & 1) for code in counts.index]
+    return pd.DataFrame({'조합': labels, '건수': counts.to_numpy()})
+
+
+# ── 쓰기 (utils/write_queue.py) ─────────────────────────────
+_batch_local = threading.local()
+
+
+@contextmanager
+def write_batch():
+    """with write_batch(): 안의 add_row/update_row/delete_row를 모아서 블록이 끝날 때 한 번에 전송.
+    행 번호는 모두 같은 로드 시점 기준으로 넘기면 된다. 중첩되면 바깥 배치에 합쳐진다.
+    여러 행을 한꺼번에 쓰는 add_rows(가져오기)·set_calendar_ids(백필/동기화)·assign_missing_ids가 쓴다.
+    예약관리 화면의 수정/삭제는 누를 때마다 한 행이므로 호출 하나가 그대로 요청 하나(배치 하나)다."""
+    batch = getattr(_batch_local, 'batch', None)
+    if batch is not None:
+        yield batch
+        return
+    batch = WriteBatch(get_sheet(), id_col=COLUMNS.index('예약ID') + 1)
+    _batch_local.batch = batch
+    try:
+        yield batch
+        if len(batch):
+            _flush(batch)
+            bump_data_version()
+    finally:
+        _batch_local.batch = None
+
+
+def new_reservation_id():
+    """예약마다 한 번 정해지고 바뀌지 않는 ID (행 위치와 무관)"""
+    return uuid.uuid4().hex[:12]
+
+
+def _with_reservation_id(row):
+    row = (list(row) + [''] * len(COLUMNS))[:len(COLUMNS)]
+    if not str(row[-1]).strip():
+        row[-1] = new_reservation_id()
+    return row
 
 
 def add_row(row_data):
-    sheet = get_sheet()
-    # No 컬럼 자동 채우기 (기존 데이터 수 + 1)
-    all_records = sheet.get_all_records()
-    next_no = len(all_records) + 1
-    sheet.append_row([next_no] + row_data, value_input_option='USER_ENTERED')
+    """한 행 추가 후 예약ID 반환 (배치 안에서도 바로 알 수 있음)"""
+    return add_rows([row_data])[0]
+
+
+def add_rows(rows):
+    """여러 행을 values.append 한 번으로 추가하고 예약ID 목록을 반환.
+    No(A열)는 붙여넣은 자리 바로 위 몇 행의 No 열만 읽어 최대값 다음으로 정함 (write_queue.next_nos) →
+    전체 시트를 읽지 않고, 삭제된 행이 있어도 기존 번호와 겹치지 않음. No는 예약ID로 다시 찾은 행에 쓴다.
+    예약ID가 비어 있는 행은 새 ID를 붙인다."""
+    rows = [_with_reservation_id(row) for row in rows]
+    if not rows:
+        return []
+    nos = None
+    if _uses_sheets():
+        with write_batch() as batch:
+            for row in rows:
+                batch.insert(row)
+        # mirror: 시트가 매긴 No를 로컬 사본에도 그대로 (바깥 배치에 합쳐져 아직 안 보냈으면 같은 규칙으로 따로)
+        if len(batch.flushed_nos) == len(rows):
+            nos = batch.flushed_nos
+    _write_local(lambda store: store.append_rows(rows, nos))
+    return [row[-1] for row in rows]
 
 
 def update_row(sheet_row_index, row_data):
     """sheet_row_index: 1-based (1=헤더, 2=첫번째 데이터)
     No 컬럼(A열)은 건드리지 않고 B열부터 업데이트"""
-    sheet = get_sheet()
-    col_end = chr(ord('B') + len(row_data) - 1)
-    sheet.update([row_data], f'B{sheet_row_index}:{col_end}{sheet_row_index}')
+    with write_batch() as batch:
+        batch.update(sheet_row_index, row_data)
+
+
+def update_column(col_name, values_by_row):
+    """한 열의 여러 칸을 한 번에 수정. values_by_row: {sheet_row_index: 값}"""
+    col_index = COLUMNS.index(col_name) + 1   # A열 = No
+    with write_batch() as batch:
+        for sheet_row_index, value in values_by_row.items():
+            batch.set_cells(sheet_row_index, col_index, [value])
+
+
+def _reservation_rows(sheet):
+    """예약ID 열만 읽어서 {예약ID: 현재 시트 행 번호}"""
+    ids = sheet.col_values(COLUMNS.index('예약ID') + 2)   # 1-based, A열 = No
+    return {str(v).strip(): i for i, v in enumerate(ids, start=1) if i > 1 and str(v).strip()}
+
+
+def set_calendar_ids(event_ids):
+    """예약ID로 행을 다시 찾아 캘린더ID 기록 (그 사이 다른 행이 삭제돼 위치가 바뀌어도 안전).
+    event_ids: {예약ID: 캘린더 이벤트 ID}. 기록한 건수 반환"""
+    written = len(event_ids)
+    if _uses_sheets():
+        rows = _with_sheet(_reservation_rows)
+        values_by_row = {rows[rid]: eid for rid, eid in event_ids.items() if rid in rows}
+        if values_by_row:
+            update_column('캘린더ID', values_by_row)
+            mark_dirty(event_ids)
+        written = len(values_by_row)
+    _write_local(lambda store: store.set_values('캘린더ID', event_ids))
+    if written:
+        # 캘린더ID만 바뀜 → 숙박 일자 점유는 그대로
+        advance_occupancy_index(get_data_version())
+    return written
+
+
+def set_calendar_id(reservation_id, event_id):
+    return set_calendar_ids({reservation_id: event_id}) > 0
 
 
 def delete_row(sheet_row_index):
     """sheet_row_index: 1-based"""
-    sheet = get_sheet()
-    sheet.delete_rows(sheet_row_index)
+    with write_batch() as batch:
+        batch.delete(sheet_row_index)
+
+
+# ── 예약ID 기준 수정/삭제 (그 행만 다시 읽어 확인) ─────────────
+class RowChangedError(Exception):
+    """불러온 뒤에 다른 곳에서 그 예약이 수정되었거나 삭제됨"""
+
+
+def locate_reservation(record):
+    """load_data의 한 행(record)이 지금 시트의 몇 번째 행인지 확인.
+
+    불러올 때의 행 번호를 먼저 읽어보고, 예약ID가 다르면(위쪽 행 삭제 등으로 밀림) ID로 찾는다.
+    행 내용이 불러올 때와 다르면 RowChangedError. 시트 전체는 다시 읽지 않는다."""
+    reservation_id = str(record['예약ID'])
+    expected = record['_row_version']
+
+    def op(sheet):
+        row = int(record['_sheet_row'])
+        current = read_row(sheet, row)
+        if current.get('예약ID', pd.Series([''])).iloc[0].strip() != reservation_id:
+            row = _reservation_rows(sheet).get(reservation_id)
+            if row is None:
+                raise RowChangedError("다른 곳에서 삭제된 예약입니다.")
+            current = read_row(sheet, row)
+        if row_versions(current, VERSION_COLUMNS)[0] != expected:
+            # 스냅샷에서 재사용한 옛 행일 수도 있으므로 다음 새로고침은 전체 다운로드
+            invalidate_snapshot()
+            raise RowChangedError("다른 곳에서 수정된 예약입니다.")
+        return row
+
+    if not reservation_id:
+        raise RowChangedError("예약ID가 없는 예약입니다.")
+    return _with_sheet(op)
+
+
+def _verify_local(record):
+    """sqlite 설정에서 locate_reservation과 같은 확인을 로컬 DB로"""
+    current = get_local_store().read_row(str(record['예약ID']))
+    if current is None:
+        raise RowChangedError("다른 곳에서 삭제된 예약입니다.")
+    if row_versions(current, VERSION_COLUMNS)[0] != record['_row_version']:
+        raise RowChangedError("다른 곳에서 수정된 예약입니다.")
+
+
+def update_reservation(record, row_data):
+    """확인 후 B열부터 수정. 확인과 쓰기 사이의 아주 짧은 순간까지 막지는 못한다 (시트에 잠금이 없음)"""
+    if _uses_sheets():
+        update_row(locate_reservation(record), row_data)
+        mark_dirty([record['예약ID']])
+    else:
+        _verify_local(record)
+    _write_local(lambda store: store.update_row(str(record['예약ID']), row_data))
+
+
+def delete_reservation(record):
+    if _uses_sheets():
+        delete_row(locate_reservation(record))
+    else:
+        _verify_local(record)
+    _write_local(lambda store: store.delete(str(record['예약ID'])))
+
+
+def assign_missing_ids():
+    """예약ID가 빈 행에 새 ID를 채움 (예약ID 열이 없으면 헤더도 추가).
+    로드 시점 행 번호 대신 지금 시트의 성함/예약ID 열만 읽어서 정하므로 밀린 행에 잘못 쓰지 않음"""
+    if not _uses_sheets():
+        count = get_local_store().assign_missing_ids(new_reservation_id)
+        bump_data_version()
+        return count
+    col = COLUMNS.index('예약ID') + 1   # 0-based, A열 = No (열이 Z를 넘지 않음)
+    letter = chr(ord('A') + col)
+    name_letter = chr(ord('A') + COLUMNS.index('성함') + 1)
+    head, names, ids = _with_sheet(lambda sheet: sheet.batch_get(['1:1', f'{name_letter}2:{name_letter}', f'{letter}2:{letter}']))
+    header = list(head[0]) if head else []
+    ids = [(r[0] if r else '') for r in ids]
+    missing = [
+        i + 2 for i, r in enumerate(names)
+        if r and str(r[0]).strip() and not (i < len(ids) and str(ids[i]).strip())
+    ]
+    needs_header = len(header) <= col or header[col] != '예약ID'
+    if not missing and not needs_header:
+        return 0
+    with write_batch() as batch:
+        if needs_header:
+            batch.set_cells(1, col, ['예약ID'])
+        for row in missing:
+            batch.set_cells(row, col, [new_reservation_id()])
+    # 옛 연도 행도 ID가 생겼으므로 스냅샷을 버리고 한 번 전체 다운로드
+    invalidate_snapshot()
+    return len(missing)
@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# 로컬 캐시 위치 (기본: 프로젝트 루트/.cache). 벤치마크처럼 따로 돌릴 때는 PENSION_CACHE_DIR로 바꾼다
+CACHE_DIR = Path(os.environ.get('PENSION_CACHE_DIR') or Path(__file__).resolve().parent.parent / '.cache')
+SNAPSHOT_DIR = CACHE_DIR
+SNAPSHOT_PATH = SNAPSHOT_DIR / 'reservations.parquet'
+META_PATH = SNAPSHOT_DIR / 'reservations.meta.json'
+# 이 앱이 직접 고친 예약ID 목록 → 옛 연도 행이어도 다음 증분 동기화 때 다시 받음
+DIRTY_PATH = SNAPSHOT_DIR / 'reservations.dirty.json'
+_dirty_lock = threading.Lock()
+
+# 올해 - FROZEN_YEARS_BACK 보다 이전 연도의 행은 더 이상 바뀌지 않는 이력으로 보고
+# 시트가 바뀌어도 다시 받지 않는다.
+FROZEN_YEARS_BACK = 1
+
+
+def _read_snapshot():
+    try:
+        meta = json.loads(META_PATH.read_text(encoding='utf-8'))
+        frame = pd.read_parquet(SNAPSHOT_PATH)
+    except (OSError, ValueError):
+        return None, None
+    return frame, meta
+
+
+def _write_snapshot(frame, meta):
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        frame.to_parquet(SNAPSHOT_PATH, index=False)
+        META_PATH.write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+    except (OSError, ImportError, ValueError):
+        # 스냅샷은 가속용일 뿐이므로 저장 실패(머리글 이름이 겹치는 시트 등)는 무시 (다음 동기화 때 전체 다운로드)
+        pass
+
+
+def _read_dirty():
+    try:
+        return set(json.loads(DIRTY_PATH.read_text(encoding='utf-8')))
+    except (OSError, ValueError):
+        return set()
+
+
+def _write_dirty(ids):
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        DIRTY_PATH.write_text(json.dumps(sorted(ids)), encoding='utf-8')
+    except OSError:
+        # 기록하지 못하면 다음 로드는 전체 다운로드
+        invalidate_snapshot()
+
+
+def mark_dirty(reservation_ids):
+    """시트에 쓴 뒤 호출. 스냅샷의 해당 예약 행은 다음 동기화 때 재사용하지 않는다"""
+    ids = {str(i) for i in reservation_ids if str(i).strip()}
+    if not ids:
+        return
+    with _dirty_lock:
+        _write_dirty(_read_dirty() | ids)
+
+
+def _clear_dirty(consumed):
+    """이번 동기화에 반영한 것만 지움 (그 사이 새로 표시된 예약은 남김)"""
+    if not consumed:
+        return
+    with _dirty_lock:
+        _write_dirty(_read_dirty() - consumed)
+
+
+def invalidate_snapshot():
+    """다음 로드는 스냅샷 없이 전체 다운로드 (스냅샷이 시트와 어긋난 게 확인됐을 때)"""
+    try:
+        META_PATH.unlink()
+    except OSError:
+        pass
+
+
+def _header(names):
+    """시트 1행 → 열 이름 목록.
+    머리글 오른쪽 끝의 빈 열(표 밖에 적힌 메모 등)은 버림 →
+    get_all_values(가장 긴 행까지 채움)와 batch_get('1:1')(끝의 빈 칸 잘림)의 열 구성이 같아짐.
+    그 사이의 빈 머리글이나 앞과 겹치는 머리글은 열 위치로 이름을 붙임 ('_Y') → 스냅샷(parquet)에 저장 가능"""
+    header = [str(name) for name in names]
+    while header and not header[-1].strip():
+        header.pop()
+    seen = set()
+    for i, name in enumerate(header):
+        if not name.strip() or name in seen:
+            header[i] = f'_{_col_letter(i + 1)}'
+        seen.add(header[i])
+    return header
+
+
+def _to_frame(header, rows):
+    header = _header(header)
+    width = len(header)
+    padded = [(list(r) + [''] * width)[:width] for r in rows]
+    return pd.DataFrame(padded, columns=header, dtype=str)
+
+
+def _row_keys(frame, year_col):
+    # (No, 연도) 조합으로 행을 식별 → 중간 삭제/삽입으로 위치가 밀려도 같은 행을 찾을 수 있음
+    nos = frame.iloc[:, 0].astype(str).str.strip()
+    years = frame[year_col].astype(str).str.strip() if year_col in frame.columns else ''
+    return list(zip(nos, years))
+
+
+def _unique_positions(keys):
+    positions = {}
+    dup = set()
+    for i, key in enumerate(keys):
+        if key in positions:
+            dup.add(key)
+        positions[key] = i
+    return {k: i for k, i in positions.items() if k not in dup and k[0]}
+
+
+def _to_ranges(rows):
+    """정렬된 시트 행 번호 목록 → 연속 구간 [(start, end), ...]"""
+    ranges = []
+    for r in rows:
+        if ranges and r == ranges[-1][1] + 1:
+            ranges[-1][1] = r
+        else:
+            ranges.append([r, r])
+    return ranges
+
+
+def _full_sync(sheet):
+    values = sheet.get_all_values()
+    if not values:
+        return pd.DataFrame(dtype=str)
+    return _to_frame(values[0], values[1:])
+
+
+def load_raw_frame(sheet, full=False, year_col='연도'):
+    """시트 전체를 문자열 DataFrame으로 반환 (헤더 = 시트 1행, 순서 = 시트 행 순서).
+
+    로컬 스냅샷과 비교해서
+      1) 스프레드시트 수정 시각이 같으면 네트워크 데이터 읽기 없이 스냅샷을 그대로 사용
+      2) 달라졌으면 헤더 + No/연도 열만 읽어서 행을 맞춰보고,
+         바뀔 수 있는 행(최근 연도, 새 행)만 구간 단위로 다시 받아온다.
+    """
+    spreadsheet = sheet.spreadsheet
+    modified = spreadsheet.get_lastUpdateTime()
+    snapshot, meta = (None, None) if full else _read_snapshot()
+    sheet_key = f"{spreadsheet.id}/{sheet.id}"
+
+    if snapshot is not None and meta.get('sheet') == sheet_key and meta.get('modified') == modified:
+        return snapshot
+
+    dirty = _read_dirty()
+    frame = None
+    if snapshot is not None and meta.get('sheet') == sheet_key:
+        frame = _delta_sync(sheet, snapshot, year_col, dirty)
+    if frame is None:
+        frame = _full_sync(sheet)
+
+    _write_snapshot(frame, {
+        'sheet': sheet_key,
+        'modified': modified,
+        'rows': len(frame),
+        'synced_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    _clear_dirty(dirty)
+    return frame
+
+
+def _delta_sync(sheet, snapshot, year_col, dirty=frozenset()):
+    header = list(snapshot.columns)
+    if year_col not in header:
+        return None
+    year_letter = _col_letter(header.index(year_col) + 1)
+
+    head_values, no_values, year_values = sheet.batch_get(
+        ['1:1', 'A2:A', f'{year_letter}2:{year_letter}']
+    )
+    if not head_values or _header(head_values[0]) != header:
+        # 열 구성이 바뀌었으면 전체 다시 받기
+        return None
+
+    n = max(len(no_values), len(year_values))
+    current = pd.DataFrame({
+        header[0]: [(r[0] if r else '') for r in no_values] + [''] * (n - len(no_values)),
+        year_col: [(r[0] if r else '') for r in year_values] + [''] * (n - len(year_values)),
+    })
+    old_positions = _unique_positions(_row_keys(snapshot, year_col))
+    cur_keys = _row_keys(current, year_col)
+    cur_unique = _unique_positions(cur_keys)
+
+    frozen_before = datetime.now().year - FROZEN_YEARS_BACK
+    old_years = pd.to_numeric(snapshot[year_col], errors='coerce')
+    # 이 앱이 고친 옛 연도 행은 얼려두지 않음
+    if dirty and '예약ID' in snapshot.columns:
+        old_years = old_years.mask(snapshot['예약ID'].isin(dirty))
+
+    reuse = {}   # 현재 위치 → 스냅샷 위치
+    fetch = []   # 다시 받아야 하는 시트 행 번호 (2-based)
+    for i, key in enumerate(cur_keys):
+        j = old_positions.get(key)
+        if j is not None and cur_unique.get(key) == i and old_years.iloc[j] < frozen_before:
+            reuse[i] = j
+        else:
+            fetch.append(i + 2)
+
+    last_col = _col_letter(len(header))
+    ranges = _to_ranges(fetch)
+    fetched = {}
+    if ranges:
+        results = sheet.batch_get([f'A{s}:{last_col}{e}' for s, e in ranges])
+        for (s, e), values in zip(ranges, results):
+            values = list(values) + [[]] * (e - s + 1 - len(values))
+            for offset, row in enumerate(values):
+                fetched[s + offset - 2] = row
+
+    rows = [
+        snapshot.iloc[reuse[i]].tolist() if i in reuse else fetched.get(i, [])
+        for i in range(n)
+    ]
+    return _to_frame(header, rows)
+
+
+def _col_letter(n):
+    """1-based 열 번호 → A1 표기 열 이름"""
+    letters = ''
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+# ── 한 행 다시 읽기 (수정/삭제 전 충돌 확인) ────────────────────
+def row_versions(frame, columns=None):
+    """행 내용 해시. 같은 내용이면 어느 위치에 있든 같은 값.
+    columns를 주면 그 열만 그 순서로 (없는 열은 빈 칸) → 읽은 경로마다 열 폭이 달라도
+    (get_all_values는 가장 긴 행까지, batch_get 헤더는 끝의 빈 칸을 잘라냄) 같은 행이면 같은 값"""
+    if columns is not None:
+        # 오른쪽 빈 머리글 열이 여러 개면 이름이 겹치므로 먼저 하나만 남김
+        frame = frame.loc[:, ~frame.columns.duplicated()].reindex(columns=columns, fill_value='')
+    return pd.util.hash_pandas_object(frame.astype(object), index=False).to_numpy()
+
+
+def read_row(sheet, row):
+    """시트 한 행만 헤더와 함께 읽어 1행짜리 문자열 DataFrame으로 (API 호출 한 번)"""
+    head_values, row_values = sheet.batch_get(['1:1', f'{row}:{row}'])
+    header = list(head_values[0]) if head_values else []
+    return _to_frame(header, [row_values[0] if row_values else []])
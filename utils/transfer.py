@@ -0,0 +1,182 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.dates import parse_dates
+from utils.sheets import COLUMNS, SERVICE_COLS, DATE_COLS, CHECKED_VALUES
+
+# 엑셀(xlsx)은 openpyxl이 설치돼 있을 때만 (CSV는 항상 가능)
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+EXPORT_COLUMNS = ['No'] + COLUMNS
+EXPORT_CHUNK = 5000
+
+
+def xlsx_available():
+    return openpyxl is not None
+
+
+# ── 가져오기 ─────────────────────────────────────────────────
+def read_upload(file):
+    """업로드 파일(CSV/XLSX) → 모든 값이 문자열인 DataFrame"""
+    name = getattr(file, 'name', '').lower()
+    if name.endswith(('.xlsx', '.xlsm')):
+        if openpyxl is None:
+            raise ValueError("엑셀 파일을 읽으려면 openpyxl 패키지가 필요합니다. CSV로 저장해서 올려주세요.")
+        raw = pd.read_excel(file, dtype=str, keep_default_na=False)
+    else:
+        try:
+            raw = pd.read_csv(file, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+        except UnicodeDecodeError:
+            # 엑셀에서 'CSV'로 저장한 한글 파일
+            file.seek(0)
+            raw = pd.read_csv(file, dtype=str, keep_default_na=False, encoding='cp949')
+    raw.columns = [str(c).strip() for c in raw.columns]
+    return raw
+
+
+def _numbers(raw, col, default=0):
+    if col not in raw.columns:
+        return pd.Series(default, index=raw.index, dtype='int64')
+    digits = raw[col].astype(str).str.replace(r'[^\d]', '', regex=True)
+    return pd.to_numeric(digits, errors='coerce').fillna(default).astype('int64')
+
+
+def _text(raw, col):
+    if col not in raw.columns:
+        return pd.Series('', index=raw.index, dtype=object)
+    return raw[col].fillna('').astype(str).str.strip()
+
+
+def prepare_import(raw, existing=None):
+    """COLUMNS 형식으로 정리한 DataFrame과 문제 목록 [(파일 행 번호, 내용)] 반환.
+
+    - 성함과 숙박 일자는 필수, 날짜는 'YYYY-MM-DD'로 통일
+    - 연도/월/퇴실 일자/추가 인원수는 입력 폼과 같은 규칙으로 다시 계산
+    - 이미 시트에 있거나(existing) 파일 안에서 겹치는 (성함, 숙박 일자)는 제외
+    No와 예약ID는 시트에 추가될 때 정해지고, 캘린더ID는 비워둔다 (캘린더 일괄 등록으로 채움)
+    """
+    problems = []
+    file_rows = pd.Series(np.arange(len(raw)) + 2, index=raw.index)   # 1행은 헤더
+
+    name = _text(raw, '성함')
+    stay = parse_dates(_text(raw, '숙박 일자'))
+    res = parse_dates(_text(raw, '예약 일자'))
+
+    nights = _numbers(raw, '숙박 일수')
+    if '퇴실 일자' in raw.columns:
+        # 숙박 일수가 없으면 퇴실 일자에서 계산
+        by_checkout = (parse_dates(_text(raw, '퇴실 일자')) - stay).dt.days
+        nights = nights.where(nights > 0, by_checkout.fillna(0).astype('int64'))
+    nights = nights.clip(lower=1)
+
+    adults = _numbers(raw, '어른 인원수', 2)
+    children = _numbers(raw, '아이 인원수')
+    total = _numbers(raw, '인원수')
+    total = total.where(total > 0, adults + children).clip(lower=1)
+
+    year = _numbers(raw, '연도')
+    fallback_year = res.dt.year.fillna(stay.dt.year).fillna(0).astype('int64')
+    year = year.where(year > 0, fallback_year)
+
+    out = pd.DataFrame({
+        '연도': year,
+        '성함': name,
+        '전화번호': _text(raw, '전화번호'),
+        '예약 월': res.dt.month.fillna(0).astype('int64'),
+        '예약 일자': res.dt.strftime('%Y-%m-%d').fillna(''),
+        '숙박 월': stay.dt.month.fillna(0).astype('int64'),
+        '숙박 일자': stay.dt.strftime('%Y-%m-%d').fillna(''),
+        '숙박 일수': nights,
+        '퇴실 일자': (stay + pd.to_timedelta(nights, unit='D')).dt.strftime('%Y-%m-%d').fillna(''),
+        '인원수': total,
+        '어른 인원수': adults,
+        '아이 인원수': children,
+        '추가 인원수': (total - 2).clip(lower=0),
+    }, index=raw.index)
+    for col in SERVICE_COLS:
+        out[col] = np.where(_text(raw, col).str.upper().isin(CHECKED_VALUES), 'O', 'X')
+    out['금액'] = _numbers(raw, '금액')
+    out['비고'] = _text(raw, '비고')
+    out['캘린더ID'] = ''
+    out['예약ID'] = ''
+    out = out[COLUMNS]
+
+    invalid = pd.Series(False, index=raw.index)
+    for mask, message in [
+        (name == '', '성함이 비어 있습니다'),
+        (stay.isna(), '숙박 일자를 읽을 수 없습니다'),
+    ]:
+        problems += [(int(r), message) for r in file_rows[mask & ~invalid]]
+        invalid |= mask
+
+    keys = out['성함'] + '|' + out['숙박 일자']
+    duplicated = keys.duplicated() & ~invalid
+    problems += [(int(r), '파일 안에서 중복된 예약입니다') for r in file_rows[duplicated]]
+    invalid |= duplicated
+    if existing is not None and not existing.empty:
+        existing_keys = set(existing['성함'].astype(str) + '|'
+                            + existing['숙박 일자'].dt.strftime('%Y-%m-%d').fillna(''))
+        exists = keys.isin(existing_keys) & ~invalid
+        problems += [(int(r), '이미 시트에 있는 예약입니다') for r in file_rows[exists]]
+        invalid |= exists
+
+    return out[~invalid].reset_index(drop=True), sorted(problems)
+
+
+def import_rows(prepared):
+    """시트에 쓸 행 목록 (numpy 값 → 파이썬 값)"""
+    return [list(row) for row in zip(*(prepared[col].tolist() for col in COLUMNS))]
+
+
+# ── 내보내기 ─────────────────────────────────────────────────
+def _export_chunks(df):
+    """시트와 같은 표기(날짜 'YYYY-MM-DD', 서비스 'O'/'X')로 EXPORT_CHUNK 행씩"""
+    cols = [c for c in EXPORT_COLUMNS if c in df.columns]
+    for start in range(0, len(df), EXPORT_CHUNK):
+        chunk = df.iloc[start:start + EXPORT_CHUNK][cols].copy()
+        for col in DATE_COLS:
+            if col in chunk.columns:
+                chunk[col] = chunk[col].dt.strftime('%Y-%m-%d').fillna('')
+        for col in SERVICE_COLS:
+            if col in chunk.columns:
+                chunk[col] = np.where(chunk[col], 'O', 'X')
+        if '성함' in chunk.columns:
+            chunk['성함'] = chunk['성함'].astype(str)
+        yield chunk
+
+
+def export_csv(df):
+    """CSV(엑셀에서 한글이 깨지지 않게 BOM 포함). 조각별로 버퍼 하나에 바로 기록"""
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding='utf-8-sig', newline='')
+    header = True
+    for chunk in _export_chunks(df):
+        chunk.to_csv(text, index=False, header=header)
+        header = False
+    if header:
+        text.write(','.join(c for c in EXPORT_COLUMNS if c in df.columns) + '\n')
+    text.flush()
+    text.detach()
+    buffer.seek(0)
+    return buffer
+
+
+def export_xlsx(df):
+    """XLSX. openpyxl write-only 모드로 행을 흘려 쓰므로 시트 전체를 메모리에 두 번 만들지 않음"""
+    if openpyxl is None:
+        raise ValueError("엑셀 내보내기에는 openpyxl 패키지가 필요합니다.")
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('예약')
+    sheet.append([c for c in EXPORT_COLUMNS if c in df.columns])
+    for chunk in _export_chunks(df):
+        for row in zip(*(chunk[col].tolist() for col in chunk.columns)):
+            sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
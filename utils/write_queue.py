@@ -0,0 +1,178 @@
+import numbers
+
+from gspread.utils import rowcol_to_a1
+
+# No는 아래로 갈수록 커지므로 최대값은 붙인 자리 바로 위 몇 행만 읽으면 알 수 있다
+NO_TAIL = 50
+
+
+def _cell(value):
+    """파이썬 값 → Sheets API CellData (RAW 입력과 동일하게 문자열은 그대로 저장)"""
+    if value is None:
+        return {'userEnteredValue': {'stringValue': ''}}
+    if isinstance(value, bool):
+        return {'userEnteredValue': {'boolValue': value}}
+    if isinstance(value, numbers.Number):
+        return {'userEnteredValue': {'numberValue': float(value)}}
+    return {'userEnteredValue': {'stringValue': str(value)}}
+
+
+def _update_cells(sheet_id, row_index, col_index, values):
+    """row_index: 1-based 시트 행, col_index: 0-based 시작 열"""
+    return {
+        'updateCells': {
+            'start': {'sheetId': sheet_id, 'rowIndex': row_index - 1, 'columnIndex': col_index},
+            'rows': [{'values': [_cell(v) for v in row]} for row in values],
+            'fields': 'userEnteredValue',
+        }
+    }
+
+
+def _delete_row(sheet_id, row_index):
+    return {
+        'deleteDimension': {
+            'range': {
+                'sheetId': sheet_id,
+                'dimension': 'ROWS',
+                'startIndex': row_index - 1,
+                'endIndex': row_index,
+            }
+        }
+    }
+
+
+def _parse_no(value):
+    try:
+        return int(float(str(value).strip()))
+    except (ValueError, OverflowError):
+        return None
+
+
+def next_nos(nos_above, count):
+    """새 행 count개의 No. nos_above: 붙일 자리 바로 위까지의 No 열 값 (시트 순서, 문자열 가능).
+
+    기존 최대 No 다음부터 매기되, 마지막 번호 있는 행 아래에 No가 빈 행이 있으면
+    (다른 곳에서 막 추가해서 아직 No를 쓰지 않은 행) 그 수만큼 건너뛴다 → 동시에 추가해도 겹치지 않음.
+    행 위치가 아니라 No 값 기준이므로 중간 행이 삭제돼도 기존 번호를 다시 쓰지 않는다.
+    시트(WriteBatch)와 로컬 DB(LocalStore)가 같은 규칙으로 번호를 매긴다."""
+    top, last = 0, -1
+    for i, value in enumerate(nos_above):
+        no = _parse_no(value)
+        if no is not None:
+            top, last = max(top, no), i
+    pending = len(nos_above) - 1 - last
+    start = top + pending + 1
+    return list(range(start, start + count))
+
+
+class WriteBatch:
+    """추가/수정/삭제를 모아뒀다가 flush()에서 한 번에 전송.
+
+    - 추가: values.append 한 번 (여러 행을 한꺼번에)
+      + 붙인 자리 위 NO_TAIL행까지의 No·예약ID 열 읽기 한 번 (values.batchGet, 시트 크기와 무관)
+    - No 기록 + 수정 + 삭제: spreadsheets.batchUpdate 한 번
+    삭제는 아래 행부터 적용하므로 같은 배치 안의 행 번호(로드 시점 기준)가 끝까지 유효하다.
+    id_col: 예약ID 열 (0-based). 주면 새 행을 붙인 위치가 아니라 예약ID로 다시 찾아 No를 쓴다
+    (그 사이 다른 세션이 위쪽 행을 지워 행이 올라가도 엉뚱한 행에 쓰지 않음).
+    """
+
+    def __init__(self, sheet, id_col=None):
+        self.sheet = sheet
+        self.id_col = id_col
+        self.inserts = []
+        self.updates = {}    # (시트 행, 시작 열) → 값 목록 (같은 칸을 여러 번 고치면 마지막 값만)
+        self.deletes = set()
+        self.appended = None   # (첫 시트 행, 예약ID 목록): 붙여넣기는 끝났고 No 기록이 남은 행들
+        self.flushed_nos = []  # 마지막 flush에서 새 행에 매긴 No
+
+    def __len__(self):
+        pending = len(self.appended[1]) if self.appended else 0
+        return len(self.inserts) + pending + len(self.updates) + len(self.deletes)
+
+    def insert(self, row_data):
+        self.inserts.append(list(row_data))
+
+    def update(self, sheet_row_index, row_data):
+        """No(A열)는 두고 B열부터 한 행 전체"""
+        self.set_cells(sheet_row_index, 1, row_data)
+
+    def set_cells(self, sheet_row_index, col_index, values):
+        """col_index: 0-based 시작 열 (0 = A열)"""
+        self.updates[(int(sheet_row_index), col_index)] = list(values)
+
+    def delete(self, sheet_row_index):
+        sheet_row_index = int(sheet_row_index)
+        self.deletes.add(sheet_row_index)
+        for key in [k for k in self.updates if k[0] == sheet_row_index]:
+            del self.updates[key]
+
+    def flush(self):
+        """전송 후 새로 추가된 행들의 No 목록을 반환.
+        도중에 실패해도 다시 부를 수 있다: 이미 붙여넣은 행은 다시 붙이지 않고 No 기록부터 이어서 한다"""
+        requests = []
+        new_nos = []
+
+        if self.inserts:
+            response = self.sheet.append_rows(
+                [[''] + row for row in self.inserts],
+                value_input_option='USER_ENTERED',
+                table_range='A1',
+            )
+            ids = [str(row[self.id_col - 1]) if self.id_col else '' for row in self.inserts]
+            self.appended = (appended_row_index(response), ids)
+            self.inserts = []
+
+        sheet_id = self.sheet.id
+        if self.appended:
+            first_row, nos_above = self._locate(*self.appended)
+            # 붙인 행이 그 사이 지워졌으면 No는 쓰지 않음
+            if first_row is not None:
+                new_nos = next_nos(nos_above, len(self.appended[1]))
+                requests.append(_update_cells(sheet_id, first_row, 0, [[no] for no in new_nos]))
+
+        for (row_index, col_index), values in sorted(self.updates.items()):
+            requests.append(_update_cells(sheet_id, row_index, col_index, [values]))
+
+        for row_index in sorted(self.deletes, reverse=True):
+            requests.append(_delete_row(sheet_id, row_index))
+
+        if requests:
+            self.sheet.spreadsheet.batch_update({'requests': requests})
+
+        self.appended, self.updates, self.deletes = None, {}, set()
+        self.flushed_nos = new_nos
+        return new_nos
+
+    def _locate(self, first_row, ids):
+        """붙인 행들의 지금 첫 행 번호와 그 위 No 열 값 (시트 순서, 빈 칸 포함).
+        위쪽이 지워지면 행은 올라갈 뿐이므로 붙인 자리까지만 읽으면 된다.
+        바로 위 NO_TAIL행에 번호 있는 행이 없거나 행을 못 찾으면 처음부터 다시 읽는다. 못 찾으면 (None, [])"""
+        last = first_row + len(ids) - 1
+        starts = [max(2, first_row - NO_TAIL)]
+        if starts[0] > 2:
+            starts.append(2)
+        for start in starts:
+            size = last - start + 1
+            ranges = [f'A{start}:A{last}']
+            if self.id_col:
+                ranges.append(f'{rowcol_to_a1(start, self.id_col + 1)}:{rowcol_to_a1(last, self.id_col + 1)}')
+            columns = [[(r[0] if r else '') for r in values] for values in self.sheet.batch_get(ranges)]
+            columns = [col + [''] * (size - len(col)) for col in columns]
+            nos = columns[0]
+            if self.id_col:
+                found = [i for i in range(size - len(ids) + 1) if columns[1][i:i + len(ids)] == ids]
+                if not found:
+                    continue
+                offset = found[-1]
+            else:
+                offset = first_row - start
+            if start == 2 or any(_parse_no(v) is not None for v in nos[:offset]):
+                return start + offset, nos[:offset]
+        return None, []
+
+
+def appended_row_index(response):
+    """append 응답의 updatedRange ("'시트1'!A105:V105") → 시트 행 번호 105"""
+    updated_range = response['updates']['updatedRange']
+    start = updated_range.split('!')[-1].split(':')[0]
+    return int(''.join(ch for ch in start if ch.isdigit()))